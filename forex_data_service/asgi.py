@@ -0,0 +1,241 @@
+"""Async serving mode for the forex data service.
+
+Runs the same routes as server.py on an ASGI server:
+
+    python3 forex_data_service/asgi.py
+    uvicorn asgi:app --port 5009   (from forex_data_service/)
+
+Requests that need bars missing from the history cache first wait for them on
+the event loop, while the download runs on a bounded fetch executor. The
+Flask view then runs on a separate request executor and finds the bars in the
+cache, so slow provider calls never hold the threads that serve cache hits.
+The price stream is served natively, without a thread per client.
+"""
+import asyncio
+import contextlib
+import contextvars
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Mount, Route
+import uvicorn
+
+import server
+from chunked_fetch import clamp_start
+from price_stream import AsyncSubscription, sse_event
+from symbols import resolve_symbol
+
+# Threads running Flask views; these only ever wait on cache hits and serialization
+REQUEST_WORKERS = int(os.environ.get('FOREX_ASGI_WORKERS', 32))
+# Threads waiting on provider downloads; enough that concurrent requests can join one batch,
+# while the provider itself still caps how many calls are in flight
+FETCH_WORKERS = int(os.environ.get('FOREX_FETCH_WORKERS', 32))
+
+request_executor = ThreadPoolExecutor(max_workers=REQUEST_WORKERS, thread_name_prefix='asgi-request')
+fetch_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='provider-fetch')
+
+# Downloads in progress, keyed like server.fetch_history, so concurrent requests await the same one
+pending_fetches = {}
+
+
+def history_needed(path, args):
+    """Returns (instrument_ids, interval, start, end, period) for routes that read history, else None."""
+    timeframe = args.get('timeframe', '1h')
+    if path in ('/api/forex-data', '/api/indicators'):
+        pairs = [args['pair']] if args.get('pair') else []
+    elif path == '/api/bulk-forex-data':
+        pairs = args['pairs'].split(',') if args.get('pairs') else []
+    else:
+        return None
+    if not pairs:
+        return None
+
+    interval, _ = server.resolve_timeframe(timeframe)
+    start = end = None
+    if path == '/api/forex-data' and args.get('start_date') and args.get('end_date'):
+        end = args['end_date']
+        # Same clamping as the view, so the prefetch fills the cache key the view reads
+        try:
+            start, _ = clamp_start(interval, args['start_date'], end)
+        except ValueError:
+            return None
+        if start is None:
+            # Entirely before the provider's lookback: the view answers 400 without fetching
+            return None
+    period = None if start else server.get_default_period(interval)
+    return [resolve_symbol(pair).id for pair in pairs], interval, start, end, period
+
+
+async def prefetch_history(path, args):
+    """Downloads the bars a request will read unless they are already cached."""
+    needed = history_needed(path, args)
+    if needed is None:
+        return
+    instrument_ids, interval, start, end, period = needed
+    _, missing = server.get_cached_history(instrument_ids, interval, start, end, period)
+    if not missing:
+        return
+
+    key = (tuple(sorted(missing)), interval, start, end, period)
+    future = pending_fetches.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(
+            fetch_executor, server.fetch_history, missing, interval, start, end, period
+        )
+        pending_fetches[key] = future
+        future.add_done_callback(lambda _: pending_fetches.pop(key, None))
+    try:
+        # shield so a client disconnecting does not cancel a download others are waiting for
+        await asyncio.shield(future)
+    except Exception as e:
+        # The view retries the fetch itself and reports the error as usual
+        print(f"Error prefetching history for {path}: {str(e)}")
+
+
+def build_environ(scope, body):
+    """Builds a WSGI environ for an ASGI HTTP request scope."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': '',
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class FlaskBridge:
+    """ASGI app serving the Flask routes of server.py from the request executor."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    async def __call__(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        args = {name: values[-1] for name, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        await prefetch_history(scope['path'], args)
+
+        loop = asyncio.get_running_loop()
+        # Streamed bodies are produced chunk by chunk on different executor threads, in one context
+        context = contextvars.copy_context()
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+        def run_view():
+            return self.wsgi_app(build_environ(scope, body), start_response)
+
+        def next_chunk(chunks):
+            for chunk in chunks:
+                if chunk:
+                    return chunk
+            return None
+
+        result = await loop.run_in_executor(request_executor, context.run, run_view)
+        chunks = iter(result)
+        try:
+            first = await loop.run_in_executor(request_executor, context.run, next_chunk, chunks)
+            await send({'type': 'http.response.start', 'status': started['status'], 'headers': started['headers']})
+            chunk = first
+            while chunk is not None:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(request_executor, context.run, next_chunk, chunks)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(request_executor, context.run, result.close)
+
+
+async def stream_prices(request):
+    """Server-sent price updates, as /api/price-stream in server.py, awaited on the event loop."""
+    pairs = request.query_params.get('pairs')
+    pairs_list = [resolve_symbol(pair).id for pair in pairs.split(',')] if pairs else []
+
+    loop = asyncio.get_running_loop()
+    subscription = server.price_broadcaster.add(AsyncSubscription(pairs_list, loop))
+    server.record_price_demand(pairs_list)
+    # The first request may have to refresh the snapshot inline
+    await loop.run_in_executor(request_executor, server.price_refresher.get)
+    subscription.wait(0)
+    snapshot = server.price_refresher.snapshot
+    if pairs_list:
+        snapshot = {pair: snapshot[pair] for pair in pairs_list if pair in snapshot}
+
+    async def generate():
+        try:
+            yield sse_event('snapshot', snapshot)
+            while True:
+                changes = await subscription.next(server.STREAM_HEARTBEAT_SECONDS)
+                server.record_price_demand(pairs_list)
+                if changes:
+                    yield sse_event('update', changes)
+                else:
+                    yield ': heartbeat\n\n'
+        finally:
+            server.price_broadcaster.unsubscribe(subscription)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if 'origin' in request.headers:
+        headers['Access-Control-Allow-Origin'] = '*'
+    return StreamingResponse(generate(), media_type='text/event-stream', headers=headers)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # uvicorn only accepts connections once startup returns, so traffic meets warm caches
+    await asyncio.get_running_loop().run_in_executor(request_executor, server.warm_start)
+    yield
+    server.price_refresher.stop()
+    if server.cache_snapshotter is not None:
+        server.cache_snapshotter.stop()
+        server.cache_snapshotter.save()
+    fetch_executor.shutdown(wait=False, cancel_futures=True)
+    request_executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/price-stream', stream_prices),
+        Mount('', app=FlaskBridge(server.app)),
+    ],
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    port = int(os.environ.get("PORT", 5009))
+    uvicorn.run(app, host='127.0.0.1', port=port)
@@ -0,0 +1,142 @@
+import contextlib
+import os
+import re
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process locks apply
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+# Column files kept per (ticker, interval) partition. Times are int64 UTC nanoseconds,
+# prices and volume are float64, one flat little-endian file per column.
+TIME_COLUMN = 'time'
+VALUE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DAILY_INTERVALS = ['1d', '5d', '1wk', '1mo', '3mo']
+
+
+class BarStore:
+    """Append-only on-disk OHLCV store partitioned by ticker and interval.
+
+    Each partition is a directory of raw column files that are read through
+    numpy memory maps, so looking up a window costs a binary search instead of a
+    parse of the whole history. Partitions are locked with flock on top of the
+    per-process locks, so worker processes sharing the directory do not
+    interleave their writes.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _partition_dir(self, ticker, interval):
+        safe_ticker = re.sub(r'[^A-Za-z0-9=^._-]', '_', ticker)
+        return os.path.join(self.root, safe_ticker, interval)
+
+    def _column_path(self, ticker, interval, column):
+        return os.path.join(self._partition_dir(ticker, interval), f'{column}.bin')
+
+    def _thread_lock(self, ticker, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((ticker, interval), threading.Lock())
+
+    @contextlib.contextmanager
+    def _lock(self, ticker, interval, exclusive=False):
+        """Holds the partition against other threads and, shared or exclusive, against other processes."""
+        with self._thread_lock(ticker, interval):
+            if fcntl is None:
+                yield
+                return
+            partition_dir = self._partition_dir(ticker, interval)
+            os.makedirs(partition_dir, exist_ok=True)
+            with open(os.path.join(partition_dir, '.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _row_count(self, ticker, interval):
+        # A torn append leaves some columns longer than others; only complete rows count
+        counts = []
+        for column in [TIME_COLUMN] + VALUE_COLUMNS:
+            path = self._column_path(ticker, interval, column)
+            if not os.path.exists(path):
+                return 0
+            counts.append(os.path.getsize(path) // 8)
+        return min(counts)
+
+    def _map(self, ticker, interval, column, dtype, rows):
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._column_path(ticker, interval, column), dtype=dtype, mode='r', shape=(rows,))
+
+    def last_timestamp(self, ticker, interval):
+        """Returns the newest stored bar time as a UTC timestamp, or None if empty."""
+        with self._lock(ticker, interval):
+            rows = self._row_count(ticker, interval)
+            if rows == 0:
+                return None
+            times = self._map(ticker, interval, TIME_COLUMN, '<i8', rows)
+            return pd.Timestamp(int(times[-1]), tz='UTC')
+
+    def read(self, ticker, interval, start=None):
+        """Returns stored bars at or after start as a frame indexed by UTC time."""
+        with self._lock(ticker, interval):
+            rows = self._row_count(ticker, interval)
+            times = self._map(ticker, interval, TIME_COLUMN, '<i8', rows)
+            first = 0
+            if start is not None and rows:
+                first = int(np.searchsorted(times, pd.Timestamp(start).value, side='left'))
+            data = {
+                column: np.array(self._map(ticker, interval, column, '<f8', rows)[first:])
+                for column in VALUE_COLUMNS
+            }
+            index = pd.DatetimeIndex(np.array(times[first:]).view('datetime64[ns]'), tz='UTC')
+
+        index.name = 'Date' if interval in DAILY_INTERVALS else 'Datetime'
+        return pd.DataFrame(data, index=index)
+
+    def write(self, ticker, interval, frame):
+        """Merges bars into the partition.
+
+        Stored bars at or after the first incoming bar are replaced, so re-fetching
+        the still-forming last candle revises it instead of duplicating it.
+        """
+        if frame.empty:
+            return
+        index = frame.index
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        times = index.tz_convert('UTC').as_unit('ns').asi8
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        keep = np.append(times[1:] != times[:-1], True)  # last occurrence wins
+        times = times[keep]
+
+        with self._lock(ticker, interval, exclusive=True):
+            os.makedirs(self._partition_dir(ticker, interval), exist_ok=True)
+            rows = self._row_count(ticker, interval)
+            stored_times = self._map(ticker, interval, TIME_COLUMN, '<i8', rows)
+            cut = int(np.searchsorted(stored_times, times[0], side='left')) if rows else 0
+            del stored_times
+
+            # Truncate the time column first so a crash never exposes half-replaced rows
+            for column in [TIME_COLUMN] + VALUE_COLUMNS:
+                path = self._column_path(ticker, interval, column)
+                with open(path, 'ab') as f:
+                    f.truncate(cut * 8)
+
+            for column in VALUE_COLUMNS:
+                if column in frame.columns:
+                    values = frame[column].to_numpy(dtype='<f8', na_value=np.nan)[order][keep]
+                else:
+                    values = np.full(len(times), np.nan, dtype='<f8')
+                with open(self._column_path(ticker, interval, column), 'ab') as f:
+                    f.write(values.tobytes())
+            with open(self._column_path(ticker, interval, TIME_COLUMN), 'ab') as f:
+                f.write(times.astype('<i8').tobytes())
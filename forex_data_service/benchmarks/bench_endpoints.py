@@ -0,0 +1,306 @@
+"""End-to-end benchmarks for the forex data service endpoints.
+
+Drives /api/forex-data, /api/bulk-forex-data, /api/forex-price and
+/api/bulk-forex-price through the Flask test client, with a synthetic
+in-process provider in place of yfinance. Every scenario runs with a cold
+cache (all caches and the bar store emptied before each request) and a warm
+one, for each pair count and interval. Each scenario runs in its own Python
+process, so the peak RSS reported for it is that scenario's alone.
+
+Usage:
+    python forex_data_service/benchmarks/bench_endpoints.py [--pairs 1,10,50] [--intervals 1m,5m,1h,1d]
+        [--requests 20] [--latency-ms 0] [--output results.json] [--compare baseline.json]
+
+--output writes the results as JSON; --compare prints each scenario's p50
+and throughput against a previous --output file, e.g. one from another commit.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+BAR_STORE_DIR = tempfile.mkdtemp(prefix='forex-bench-bars-')
+# Configure the service before importing it: no rate limits, no background refresh during a run
+os.environ.setdefault('FOREX_PROVIDER', 'replay')
+os.environ.setdefault('FOREX_FIXTURE_DIR', BAR_STORE_DIR)
+os.environ['FOREX_BAR_STORE_DIR'] = BAR_STORE_DIR
+SHARED_CACHE_DIR = tempfile.mkdtemp(prefix='forex-bench-shared-')
+os.environ['FOREX_SHARED_CACHE_PATH'] = os.path.join(SHARED_CACHE_DIR, 'shared_cache.sqlite')
+os.environ.setdefault('FOREX_PRICE_REFRESH_SECONDS', '86400')
+# Results should not depend on the day of the week
+os.environ.setdefault('FOREX_MARKET_HOURS', '0')
+# No cache snapshot file or prefetch: every scenario controls its own cache state
+os.environ['FOREX_CACHE_SNAPSHOT_PATH'] = ''
+os.environ['FOREX_PREFETCH_PAIRS'] = ''
+
+import server  # noqa: E402
+from providers import MarketDataProvider  # noqa: E402
+from symbols import CURRENCIES  # noqa: E402
+from universe import SymbolUniverse  # noqa: E402
+
+INTERVAL_LENGTHS = {
+    '1m': pd.Timedelta(minutes=1),
+    '2m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(days=1),
+    '1wk': pd.Timedelta(weeks=1),
+}
+
+# Every cross of the majors plus a few exotics: 56 + 4 distinct pairs
+BENCH_PAIRS = [f'{base}/{quote}' for base in CURRENCIES for quote in CURRENCIES if base != quote] + [
+    'USD/SEK', 'USD/NOK', 'USD/MXN', 'USD/ZAR'
+]
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Deterministic random-walk bars for any ticker, generated in memory.
+
+    Prices only depend on the ticker and the bar time, so repeated runs and
+    overlapping windows see identical data. latency_seconds is added to
+    every call to stand in for the network.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, latency_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def _bars(self, ticker, interval, start, end):
+        step = INTERVAL_LENGTHS[interval]
+        index = pd.date_range(start.ceil(step), end, freq=step, tz='UTC', inclusive='left', name='Datetime')
+        steps = index.asi8 // step.value
+        base = 0.5 + (zlib.crc32(ticker.encode()) % 1000) / 500
+        # A smooth but irregular path that is a pure function of the bar number
+        close = base * (1 + 0.01 * np.sin(steps / 37.0) + 0.003 * np.sin(steps / 5.3))
+        spread = base * 2e-4
+        return pd.DataFrame({
+            'Open': close - spread / 2,
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Adj Close': close,
+            'Volume': np.zeros(len(index)),
+        }, index=index)
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        now = pd.Timestamp.now(tz='UTC')
+        if start is not None:
+            start = pd.Timestamp(start)
+            start = start.tz_localize('UTC') if start.tz is None else start.tz_convert('UTC')
+            end = pd.Timestamp(end, tz='UTC') if end is not None else now
+        else:
+            start, end = now - server.PERIOD_LENGTHS.get(period, pd.Timedelta(days=30)), now
+        return {ticker: self._bars(ticker, interval, start, end) for ticker in tickers}
+
+    def info(self, ticker):
+        return {'regularMarketPrice': self.last_price(ticker)}
+
+    def last_price(self, ticker):
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return 0.5 + (zlib.crc32(ticker.encode()) % 1000) / 500
+
+
+def reset_caches():
+    """Empties every cache and the bar store so the next request starts cold."""
+    server.history_cache.clear()
+    server.compressed_cache.clear()
+    server.quote_cache.clear()
+    server.indicator_cache.clear()
+    server.price_refresher.snapshot = {}
+    server.price_refresher.snapshot_time = 0
+    server.shared_store.delete_prefix('')
+    server.symbol_universe = SymbolUniverse(
+        server.PRICE_UNIVERSE, server.PRICE_UNIVERSE_TIERS, server.PRICE_UNIVERSE_DROP_SECONDS,
+        server.PRICE_UNIVERSE_MAX_SYMBOLS
+    )
+    shutil.rmtree(BAR_STORE_DIR, ignore_errors=True)
+    os.makedirs(BAR_STORE_DIR, exist_ok=True)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def scenario_urls(endpoint, pairs, interval):
+    if endpoint == 'forex-data':
+        return [f'/api/forex-data?pair={pair}&timeframe={interval}' for pair in pairs]
+    if endpoint == 'bulk-forex-data':
+        return [f'/api/bulk-forex-data?pairs={",".join(pairs)}&timeframe={interval}']
+    if endpoint == 'forex-price':
+        return [f'/api/forex-price?pair={pair}' for pair in pairs]
+    return [f'/api/bulk-forex-price?pairs={",".join(pairs)}']
+
+
+def run_scenario(client, urls, requests, cold):
+    """Issues requests GETs, cycling through urls, and returns timing and size figures."""
+    if not cold:
+        for url in urls:
+            client.get(url)
+
+    latencies = []
+    body_bytes = 0
+    errors = 0
+    elapsed = 0.0
+    for i in range(requests):
+        if cold:
+            reset_caches()
+        started = time.perf_counter()
+        response = client.get(urls[i % len(urls)])
+        latency = time.perf_counter() - started
+        elapsed += latency
+        latencies.append(latency)
+        body_bytes += len(response.get_data())
+        if response.status_code != 200:
+            errors += 1
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else None,
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+        'mean_bytes': int(body_bytes / requests),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVICE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {scenario['name']: scenario for scenario in json.load(f)['scenarios']}
+    print(f'\n{"scenario":44} {"p50 base":>10} {"p50 now":>10} {"ratio":>7} {"rps ratio":>10}')
+    for scenario in results['scenarios']:
+        before = baseline.get(scenario['name'])
+        if before is None:
+            continue
+        p50_ratio = scenario['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('nan')
+        rps_ratio = scenario['throughput_rps'] / before['throughput_rps'] if before['throughput_rps'] else float('nan')
+        print(f'{scenario["name"]:44} {before["p50_ms"]:10.2f} {scenario["p50_ms"]:10.2f} {p50_ratio:7.2f} {rps_ratio:10.2f}')
+
+
+def run_single(spec, requests, latency_ms):
+    """Runs one scenario in this process and prints its result as JSON."""
+    endpoint, interval, count, cache = spec.split(',')
+    count = int(count)
+    provider = SyntheticProvider(latency_seconds=latency_ms / 1000)
+    # Keep the concurrency limiter and its metrics hook, swap what it calls
+    server.provider.inner = provider
+    # Done up front so the scenario does not race the warm-up the first request would start
+    server.warm_start()
+    client = server.app.test_client()
+
+    reset_caches()
+    calls_before = provider.calls
+    result = run_scenario(client, scenario_urls(endpoint, BENCH_PAIRS[:count], interval), requests, cache == 'cold')
+    result.update({
+        'name': f'{endpoint} {interval} {count}p {cache}',
+        'endpoint': endpoint,
+        'interval': None if interval == '-' else interval,
+        'pairs': count,
+        'cache': cache,
+        'provider_calls': provider.calls - calls_before,
+    })
+    print(json.dumps(result))
+
+
+def run_isolated(spec, args):
+    """Runs one scenario in a fresh interpreter; ru_maxrss is per process, so only then is its peak its own."""
+    command = [
+        sys.executable, os.path.abspath(__file__), '--scenario', spec,
+        '--requests', str(args.requests), '--latency-ms', str(args.latency_ms),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f'Scenario {spec} failed:\n{completed.stderr}')
+    # The service may print to stdout too; the result is the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--pairs', default='1,10,50', help='comma-separated pair counts')
+    parser.add_argument('--intervals', default='1m,5m,1h,1d', help='comma-separated intervals')
+    parser.add_argument('--endpoints', default='forex-data,bulk-forex-data,forex-price,bulk-forex-price')
+    parser.add_argument('--requests', type=int, default=20, help='requests per scenario')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='simulated provider latency per call')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='compare against a previous --output file')
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    try:
+        if args.scenario:
+            run_single(args.scenario, args.requests, args.latency_ms)
+            return
+
+        scenarios = []
+        for endpoint in args.endpoints.split(','):
+            # Prices do not depend on the interval
+            intervals = args.intervals.split(',') if endpoint.endswith('data') else ['-']
+            for interval in intervals:
+                for count in args.pairs.split(','):
+                    for cache in ('cold', 'warm'):
+                        result = run_isolated(f'{endpoint},{interval},{count},{cache}', args)
+                        scenarios.append(result)
+                        print(
+                            f'{result["name"]:44} {result["throughput_rps"]:9.1f} req/s  p50 {result["p50_ms"]:9.2f} ms  '
+                            f'p99 {result["p99_ms"]:9.2f} ms  {result["mean_bytes"] / 1e3:9.1f} kB  '
+                            f'rss {result["peak_rss_mb"]:7.1f} MB'
+                        )
+
+        results = {
+            'commit': git_commit(),
+            'timestamp': pd.Timestamp.now(tz='UTC').isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'settings': vars(args),
+            'scenarios': scenarios,
+        }
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        if args.compare:
+            compare(results, args.compare)
+    finally:
+        shutil.rmtree(BAR_STORE_DIR, ignore_errors=True)
+        shutil.rmtree(SHARED_CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Compares the per-pair records pipeline with the vectorized one in serialization.py.
+
+Usage: python forex_data_service/benchmarks/bench_serialization.py [pairs] [days] [repeats]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serialization import frame_columns, records_by_pair_json  # noqa: E402
+
+
+def make_frames(pairs, days):
+    """Builds deterministic 1m bars shaped like yfinance output, one frame per pair."""
+    index = pd.date_range(end='2026-01-02 00:00', periods=days * 24 * 60, freq='1min', tz='UTC', name='Datetime')
+    rng = np.random.default_rng(42)
+    frames = {}
+    for i in range(pairs):
+        close = 1 + i * 0.1 + np.cumsum(rng.normal(0, 1e-4, len(index)))
+        frame = pd.DataFrame({
+            'Open': close,
+            'High': close + 5e-5,
+            'Low': close - 5e-5,
+            'Close': close,
+            'Adj Close': close,
+            'Volume': np.zeros(len(index)),
+        }, index=index)
+        frame.iloc[::97, 0] = np.nan  # sprinkle gaps so NaN handling is exercised
+        frames[f'PAIR{i}'] = frame
+    return frames
+
+
+def legacy_records(frames):
+    """The previous per-pair loop from get_bulk_forex_data, serialized with json."""
+    results = {}
+    for pair, frame in frames.items():
+        pair_data = frame.copy()
+        pair_data.reset_index(inplace=True)
+        timestamp_col = 'Datetime' if 'Datetime' in pair_data.columns else 'Date'
+        if pair_data[timestamp_col].dt.tz:
+            pair_data[timestamp_col] = pair_data[timestamp_col].dt.tz_convert('UTC')
+        else:
+            pair_data[timestamp_col] = pair_data[timestamp_col].dt.tz_localize('UTC')
+        pair_data['time'] = pair_data[timestamp_col].dt.strftime('%Y-%m-%d %H:%M:%S')
+        pair_data.rename(columns={
+            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
+        }, inplace=True)
+        required_cols = ['time', 'open', 'high', 'low', 'close', 'volume']
+        pair_data.replace({np.nan: None}, inplace=True)
+        results[pair] = pair_data[required_cols].to_dict(orient='records')
+    return json.dumps(results)
+
+
+def vectorized_records(frames):
+    return records_by_pair_json({pair: frame_columns(frame) for pair, frame in frames.items()})
+
+
+def measure(fn, frames, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        body = fn(frames)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(body)
+
+
+if __name__ == '__main__':
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 29
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    frames = make_frames(pairs, days)
+
+    legacy_seconds, legacy_bytes = measure(legacy_records, frames, repeats)
+    vectorized_seconds, vectorized_bytes = measure(vectorized_records, frames, repeats)
+
+    print(f'{pairs} pairs x {days} days of 1m bars ({pairs * days * 1440} bars), median of {repeats} runs')
+    print(f'legacy      {legacy_seconds * 1000:9.1f} ms  {legacy_bytes / 1e6:6.1f} MB')
+    print(f'vectorized  {vectorized_seconds * 1000:9.1f} ms  {vectorized_bytes / 1e6:6.1f} MB')
+    print(f'speedup     {legacy_seconds / vectorized_seconds:9.1f}x')
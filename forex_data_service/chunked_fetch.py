@@ -0,0 +1,93 @@
+import pandas as pd
+
+# Longest date range yfinance serves in one request, where that is less than its lookback;
+# longer ranges are split. Only 1m has such a limit, of about 8 days.
+MAX_REQUEST_SPANS = {
+    '1m': pd.Timedelta(days=7),
+}
+
+# How far back yfinance has intraday bars at all. Ranges reaching further are clamped
+# to the oldest day still served; chunks before it would only come back empty.
+PROVIDER_LOOKBACKS = {
+    '1m': pd.Timedelta(days=30),
+    '2m': pd.Timedelta(days=60),
+    '5m': pd.Timedelta(days=60),
+    '15m': pd.Timedelta(days=60),
+    '30m': pd.Timedelta(days=60),
+    '60m': pd.Timedelta(days=730),
+    '90m': pd.Timedelta(days=60),
+    '1h': pd.Timedelta(days=730),
+}
+
+
+def _utc(timestamp):
+    timestamp = pd.Timestamp(timestamp)
+    return timestamp.tz_localize('UTC') if timestamp.tz is None else timestamp.tz_convert('UTC')
+
+
+def clamp_start(interval, start, end, now=None):
+    """Moves start up to the oldest day the provider still has bars for at interval.
+
+    Returns (start, clamped). start comes back unchanged when it is within the
+    lookback, as a 'YYYY-MM-DD' string when it was clamped, and as None when
+    the whole range lies before the lookback.
+    """
+    lookback = PROVIDER_LOOKBACKS.get(interval)
+    if lookback is None:
+        return start, False
+    # Whole days keep the clamped start, and with it cache keys, stable through the day
+    oldest = ((now or pd.Timestamp.now(tz='UTC')) - lookback).ceil('D')
+    if _utc(start) >= oldest:
+        return start, False
+    if _utc(end) <= oldest:
+        return None, True
+    return oldest.strftime('%Y-%m-%d'), True
+
+
+def split_range(interval, start, end):
+    """Splits [start, end) into consecutive ranges no longer than the provider allows for interval."""
+    span = MAX_REQUEST_SPANS.get(interval)
+    start, end = _utc(start), _utc(end)
+    if span is None or end - start <= span:
+        return [(start, end)]
+    chunks = []
+    while start < end:
+        # Naive UTC, the way callers pass dates to the provider
+        chunks.append((start.tz_localize(None), min(start + span, end).tz_localize(None)))
+        start += span
+    return chunks
+
+
+def stitch(frames):
+    """Joins chunk frames into one sorted frame, keeping the later copy of a bar two chunks both returned."""
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    combined = pd.concat(frames)
+    combined = combined[~combined.index.duplicated(keep='last')]
+    return combined.sort_index()
+
+
+def download_chunked(download, tickers, interval, start, end, executor=None):
+    """Downloads a date range for tickers in provider-sized chunks and returns one frame per ticker.
+
+    download is called as download(tickers, interval, start=..., end=...) and
+    must return {ticker: frame}. Chunks run concurrently on executor when one
+    is given, so its size bounds the parallelism; ranges that fit in one
+    request are passed straight through.
+    """
+    chunks = split_range(interval, start, end)
+    if len(chunks) == 1:
+        return download(tickers, interval, start=start, end=end)
+
+    if executor is None:
+        results = [download(tickers, interval, start=chunk_start, end=chunk_end) for chunk_start, chunk_end in chunks]
+    else:
+        futures = [
+            executor.submit(download, tickers, interval, start=chunk_start, end=chunk_end)
+            for chunk_start, chunk_end in chunks
+        ]
+        results = [future.result() for future in futures]
+    return {ticker: stitch([result.get(ticker) for result in results]) for ticker in tickers}
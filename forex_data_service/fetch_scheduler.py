@@ -0,0 +1,170 @@
+import os
+import random
+import threading
+import time
+
+# Sustained provider calls per second and burst size; None means unlimited
+PROVIDER_RATE_LIMITS = {
+    'yfinance': (2.0, 5),
+    'record': (2.0, 5),
+    'replay': None,
+}
+
+
+def is_rate_limited(error):
+    """Tells whether a provider error means we are being throttled."""
+    message = str(error)
+    return 'RateLimit' in type(error).__name__ or 'Too Many Requests' in message or '429' in message
+
+
+class TokenBucket:
+    """Allows rate calls per second on average, with bursts of up to capacity calls."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def acquire(self):
+        """Blocks until a call may be made."""
+        waited = False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    if waited:
+                        self.throttled += 1
+                    return
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            waited = True
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        """Holds back every call for seconds, e.g. after the provider reported throttling."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class _Batch:
+    def __init__(self):
+        self.tickers = {}  # insertion-ordered set
+        self.requests = 0
+        self.closed = threading.Event()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class FetchScheduler:
+    """Merges concurrent downloads of the same interval and range into one multi-ticker provider call.
+
+    The first caller for a (interval, start, end, period, auto_adjust) group
+    opens a batch and waits window_seconds, or until max_batch tickers have
+    joined, before downloading everything in it; every caller gets back the
+    frames for its own tickers. Calls go through a token bucket, and calls
+    the provider throttles are retried with exponential backoff.
+    """
+
+    def __init__(self, provider, window_seconds, max_batch, bucket=None, max_retries=3, backoff_seconds=1.0):
+        self.provider = provider
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._batches = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.batched_tickers = 0
+        self.retries = 0
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        """Same contract as MarketDataProvider.download, but shared with concurrent callers."""
+        group = (interval, start, end, period, auto_adjust)
+        with self._lock:
+            self.requests += 1
+            batch = self._batches.get(group)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._batches[group] = batch
+            batch.tickers.update(dict.fromkeys(tickers))
+            batch.requests += 1
+            if len(batch.tickers) >= self.max_batch:
+                # Full: send it now and let later callers start a new batch
+                del self._batches[group]
+                batch.closed.set()
+
+        if not leader:
+            batch.done.wait()
+        else:
+            batch.closed.wait(self.window_seconds)
+            with self._lock:
+                if self._batches.get(group) is batch:
+                    del self._batches[group]
+                self.batches += 1
+                self.batched_tickers += len(batch.tickers)
+            try:
+                batch.result = self._download(list(batch.tickers), interval, start, end, period, auto_adjust)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+
+        if batch.error is not None:
+            raise batch.error
+        return {ticker: batch.result[ticker] for ticker in tickers if ticker in batch.result}
+
+    def _download(self, tickers, interval, start, end, period, auto_adjust):
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                return self.provider.download(tickers, interval, start=start, end=end, period=period, auto_adjust=auto_adjust)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limited(e):
+                    raise
+                delay = self.backoff_seconds * 2 ** attempt * random.uniform(1, 1.5)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                print(f"Provider throttled, retrying in {delay:.1f}s: {str(e)}")
+                if self.bucket is not None:
+                    self.bucket.pause(delay)
+                else:
+                    time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'tickers_per_batch': round(self.batched_tickers / self.batches, 2) if self.batches else 0.0,
+                'open_batches': len(self._batches),
+                'window_ms': round(self.window_seconds * 1000),
+                'retries': self.retries,
+                'throttled_waits': self.bucket.throttled if self.bucket is not None else 0,
+            }
+
+
+def create_scheduler(provider, window_seconds, max_batch):
+    """Builds a FetchScheduler for provider, rate limited per PROVIDER_RATE_LIMITS or FOREX_PROVIDER_RATE.
+
+    FOREX_PROVIDER_RATE is "calls_per_second:burst", e.g. "2:5".
+    """
+    rate = PROVIDER_RATE_LIMITS.get(provider.name)
+    if os.environ.get('FOREX_PROVIDER_RATE'):
+        per_second, _, burst = os.environ['FOREX_PROVIDER_RATE'].partition(':')
+        rate = (float(per_second), int(burst or 1))
+    bucket = TokenBucket(*rate) if rate else None
+    return FetchScheduler(provider, window_seconds, max_batch, bucket=bucket)
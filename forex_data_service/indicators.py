@@ -0,0 +1,229 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Indicator name -> default parameters
+INDICATOR_DEFAULTS = {
+    'sma': (20,),
+    'ema': (20,),
+    'rsi': (14,),
+    'atr': (14,),
+    'bbands': (20, 2.0),
+}
+
+
+def parse_indicators(spec):
+    """Parses 'sma:20,ema:50,rsi,bbands:20:2' into a tuple of (name, params) pairs.
+
+    Raises ValueError for unknown indicators or malformed parameters.
+    """
+    indicators = []
+    for item in spec.split(','):
+        name, *params = item.strip().lower().split(':')
+        if name not in INDICATOR_DEFAULTS:
+            raise ValueError(f'Unknown indicator "{name}". Use one of: {", ".join(INDICATOR_DEFAULTS)}.')
+        defaults = INDICATOR_DEFAULTS[name]
+        if len(params) > len(defaults):
+            raise ValueError(f'Too many parameters for "{name}".')
+        values = list(defaults)
+        for i, param in enumerate(params):
+            values[i] = type(defaults[i])(param)
+        if values[0] < 1:
+            raise ValueError(f'The period of "{name}" must be a positive integer.')
+        indicator = (name, tuple(values))
+        if indicator not in indicators:
+            indicators.append(indicator)
+    return tuple(indicators)
+
+
+def _format_param(value):
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def indicator_label(name, params):
+    """Returns the response column prefix for an indicator, e.g. 'ema_50' or 'bbands_20_2'."""
+    return '_'.join([name] + [_format_param(param) for param in params])
+
+
+def _rolling(values, period, start, reducer):
+    """Applies reducer over trailing windows of period values for every index from start on."""
+    out = np.full(len(values) - start, np.nan)
+    low = max(start - period + 1, 0)
+    if len(values) - low >= period:
+        windows = sliding_window_view(values[low:], period)
+        # The first window ends at low + period - 1, which is never before start
+        out[low + period - 1 - start:] = reducer(windows, axis=1)
+    return out
+
+
+def _smooth(values, alpha, period, first, start, previous):
+    """Exponential smoothing seeded with the simple mean of the first period values.
+
+    values[first:] are the inputs; the seed lands on index first + period - 1.
+    Only indices from start on are computed, continuing from previous, the
+    smoothed value at start - 1, when start is past the seed.
+    """
+    out = np.full(len(values) - start, np.nan)
+    seed_index = first + period - 1
+    if len(values) <= seed_index:
+        return out
+    if start <= seed_index:
+        chain = np.concatenate(([values[first:seed_index + 1].mean()], values[seed_index + 1:]))
+        chain_start = seed_index
+    else:
+        chain = np.concatenate(([previous], values[start:]))
+        chain_start = start - 1
+    smoothed = pd.Series(chain).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    if chain_start < start:
+        smoothed = smoothed[1:]
+    out[max(chain_start, start) - start:] = smoothed
+    return out
+
+
+def _previous(arrays, name, start):
+    return arrays[name][start - 1] if start else np.nan
+
+
+def _sma(columns, params, start, arrays):
+    period, = params
+    return {'': _rolling(columns['close'], period, start, np.mean)}
+
+
+def _ema(columns, params, start, arrays):
+    period, = params
+    return {'': _smooth(columns['close'], 2 / (period + 1), period, 0, start, _previous(arrays, '', start))}
+
+
+def _bbands(columns, params, start, arrays):
+    period, width = params
+    middle = _rolling(columns['close'], period, start, np.mean)
+    deviation = _rolling(columns['close'], period, start, np.std)
+    return {'upper': middle + width * deviation, 'middle': middle, 'lower': middle - width * deviation}
+
+
+def _rsi(columns, params, start, arrays):
+    period, = params
+    close = columns['close']
+    change = np.concatenate(([np.nan], np.diff(close)))
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+    avg_gain = _smooth(gain, 1 / period, period, 1, start, _previous(arrays, '_avg_gain', start))
+    avg_loss = _smooth(loss, 1 / period, period, 1, start, _previous(arrays, '_avg_loss', start))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    rsi[np.isnan(avg_gain)] = np.nan
+    return {'': rsi, '_avg_gain': avg_gain, '_avg_loss': avg_loss}
+
+
+def _atr(columns, params, start, arrays):
+    period, = params
+    high, low, close = columns['high'], columns['low'], columns['close']
+    previous_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    return {'': _smooth(true_range, 1 / period, period, 0, start, _previous(arrays, '', start))}
+
+
+INDICATOR_FUNCTIONS = {
+    'sma': _sma,
+    'ema': _ema,
+    'bbands': _bbands,
+    'rsi': _rsi,
+    'atr': _atr,
+}
+
+# Bar columns the indicators read; a change in any of them invalidates the computed values
+INPUT_COLUMNS = ['high', 'low', 'close']
+
+
+class IndicatorSeries:
+    """Indicator values for one bar series, kept up to date as new bars arrive.
+
+    Each update only computes the bars that are new or were revised since the
+    previous one, continuing the moving averages from their stored state.
+    Bars that drop out of the front of the window are discarded, so values
+    for the remaining bars keep the warm-up from the longer history they
+    were first computed with.
+    """
+
+    def __init__(self, indicators):
+        self.indicators = indicators
+        self.source = None
+        self.columns = None
+        self.arrays = {}
+        self.full_computes = 0
+        self.incremental_updates = 0
+        self._lock = threading.Lock()
+
+    def update(self, source, columns_for):
+        """Returns the indicator columns for source, a bar frame.
+
+        columns_for turns source into bar columns; it is only called when
+        source is not the frame of the previous update.
+        """
+        with self._lock:
+            if source is not self.source:
+                self._apply(columns_for(source))
+                self.source = source
+            return self.result()
+
+    def result(self):
+        result = {'time': self.columns['time']}
+        for key, values in self.arrays.items():
+            if not key[1].startswith('_'):
+                label = indicator_label(*key[0])
+                result[f'{label}_{key[1]}' if key[1] else label] = values
+        return result
+
+    def _apply(self, columns):
+        columns = {name: columns[name] for name in ['time'] + INPUT_COLUMNS}
+        start = self._reusable_bars(columns)
+        if start is None:
+            start = 0
+            arrays = {}
+            self.full_computes += 1
+        else:
+            # Drop bars that left the front of the window and keep the rest up to start
+            dropped = int(np.searchsorted(self.columns['time'], columns['time'][0]))
+            arrays = {key: values[dropped:dropped + start] for key, values in self.arrays.items()}
+            self.incremental_updates += 1
+
+        for indicator in self.indicators:
+            name, params = indicator
+            previous = {output: values for (key, output), values in arrays.items() if key == indicator}
+            computed = INDICATOR_FUNCTIONS[name](columns, params, start, previous)
+            for output, values in computed.items():
+                key = (indicator, output)
+                arrays[key] = np.concatenate((arrays[key], values)) if key in arrays else values
+
+        self.columns = columns
+        self.arrays = arrays
+
+    def _reusable_bars(self, columns):
+        """Returns how many leading bars of columns already have valid values, or None to recompute all.
+
+        The last stored bar is never reused since it may still have been forming.
+        """
+        if self.columns is None or not len(columns['time']):
+            return None
+        old_time = self.columns['time']
+        dropped = int(np.searchsorted(old_time, columns['time'][0]))
+        if dropped >= len(old_time) or old_time[dropped] != columns['time'][0]:
+            return None
+        kept = len(old_time) - dropped - 1
+        if kept < 1 or kept > len(columns['time']):
+            return None
+        for name in ['time'] + INPUT_COLUMNS:
+            if not np.array_equal(self.columns[name][dropped:dropped + kept], columns[name][:kept], equal_nan=True):
+                return None
+        return kept
+
+    def __sizeof__(self):
+        size = object.__sizeof__(self)
+        if self.columns is not None:
+            size += sum(values.nbytes for values in self.columns.values())
+        return size + sum(values.nbytes for values in self.arrays.values())
+
+    def stats(self):
+        return {'full_computes': self.full_computes, 'incremental_updates': self.incremental_updates}
@@ -0,0 +1,80 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+MARKET_TIMEZONE = ZoneInfo('America/New_York')
+MINUTES_PER_WEEK = 7 * 24 * 60
+
+
+def _minute_of_week(weekday, hour, minute):
+    return weekday * 24 * 60 + hour * 60 + minute
+
+
+# Weekly trading windows in New York time as (open, close) minutes since Monday 00:00;
+# a window whose close is before its open wraps over the weekend. Holidays are not modelled.
+FX_WEEK = [(_minute_of_week(6, 17, 0), _minute_of_week(4, 17, 0))]
+US_CASH_SESSION = [(_minute_of_week(day, 9, 30), _minute_of_week(day, 16, 0)) for day in range(5)]
+
+MARKET_SESSIONS = {
+    'forex': FX_WEEK,
+    # Metal and oil futures trade close to FX hours, Sunday evening to Friday evening
+    'metal': FX_WEEK,
+    'commodity': FX_WEEK,
+    'crypto': None,
+    'index': US_CASH_SESSION,
+    'equity': US_CASH_SESSION,
+}
+
+
+class MarketCalendar:
+    """Tells whether an asset class is trading and how long until it next opens.
+
+    Asset classes without sessions, like crypto, are always open, as is
+    everything when the calendar is disabled.
+    """
+
+    def __init__(self, enabled=True, sessions=MARKET_SESSIONS):
+        self.enabled = enabled
+        self.sessions = sessions
+
+    def _windows(self, asset_class):
+        if not self.enabled:
+            return None
+        return self.sessions.get(asset_class)
+
+    def is_open(self, asset_class, now=None):
+        windows = self._windows(asset_class)
+        if windows is None:
+            return True
+        minute = self._local_minute(now)
+        for start, end in windows:
+            if start <= end and start <= minute < end:
+                return True
+            if start > end and (minute >= start or minute < end):
+                return True
+        return False
+
+    def seconds_until_open(self, asset_class, now=None):
+        """Returns 0 while the market is open, otherwise the seconds until its next session starts."""
+        if self.is_open(asset_class, now):
+            return 0
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        local = now.astimezone(MARKET_TIMEZONE)
+        minute = self._local_minute(now)
+        wait = min((start - minute) % MINUTES_PER_WEEK for start, _ in self._windows(asset_class))
+        # Add in wall-clock time so a daylight saving change in between is accounted for
+        opens_at = (local.replace(tzinfo=None, second=0, microsecond=0) + datetime.timedelta(minutes=wait)).replace(tzinfo=MARKET_TIMEZONE)
+        return max(0, (opens_at - now).total_seconds())
+
+    def ttl(self, asset_class, ttl, now=None):
+        """Stretches a cache TTL to the next open while the market is closed, since no new bars arrive."""
+        return max(ttl, self.seconds_until_open(asset_class, now))
+
+    def _local_minute(self, now):
+        local = (now or datetime.datetime.now(datetime.timezone.utc)).astimezone(MARKET_TIMEZONE)
+        return _minute_of_week(local.weekday(), local.hour, local.minute)
+
+    def stats(self, now=None):
+        return {
+            'enabled': self.enabled,
+            'open': {asset_class: self.is_open(asset_class, now) for asset_class in self.sessions},
+        }
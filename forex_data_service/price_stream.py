@@ -0,0 +1,134 @@
+import asyncio
+import json
+import threading
+
+
+class Subscription:
+    """Pending price changes for one stream client.
+
+    Changes that arrive while the client is still writing the previous batch
+    are merged, so a slow client gets the latest price per pair rather than
+    an ever-growing backlog.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = set(pairs) if pairs else None  # None means every pair
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def offer(self, changes):
+        """Queues the changes for subscribed pairs; returns whether there were any."""
+        if self.pairs is None:
+            relevant = changes
+        elif len(self.pairs) < len(changes):
+            relevant = {pair: changes[pair] for pair in self.pairs if pair in changes}
+        else:
+            relevant = {pair: entry for pair, entry in changes.items() if pair in self.pairs}
+        if relevant:
+            with self._lock:
+                self._pending.update(relevant)
+                self._ready.set()
+        return bool(relevant)
+
+    def wait(self, timeout):
+        """Returns the changes gathered since the last call, or {} after timeout seconds."""
+        self._ready.wait(timeout)
+        with self._lock:
+            changes = self._pending
+            self._pending = {}
+            self._ready.clear()
+        return changes
+
+
+class AsyncSubscription(Subscription):
+    """Subscription whose changes are awaited on an asyncio event loop instead of a blocked thread."""
+
+    def __init__(self, pairs, loop):
+        super().__init__(pairs)
+        self._loop = loop
+        self._async_ready = asyncio.Event()
+
+    def offer(self, changes):
+        relevant = super().offer(changes)
+        if relevant:
+            try:
+                self._loop.call_soon_threadsafe(self._async_ready.set)
+            except RuntimeError:
+                # The loop has shut down; the stream is going away with it
+                pass
+        return relevant
+
+    async def next(self, timeout):
+        """Returns the changes gathered since the last call, or {} after timeout seconds."""
+        deadline = self._loop.time() + timeout
+        while True:
+            changes = self.wait(0)
+            remaining = deadline - self._loop.time()
+            if changes or remaining <= 0:
+                return changes
+            # Any offer after the check above sets the event again once the loop runs it
+            self._async_ready.clear()
+            try:
+                await asyncio.wait_for(self._async_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _quote(entry):
+    if entry is None:
+        return None
+    return entry.get('price'), entry.get('error')
+
+
+class PriceBroadcaster:
+    """Turns successive price snapshots into diffs and fans them out to subscribers.
+
+    The diff is computed once per snapshot no matter how many clients are
+    connected; each client only filters it down to its own pairs.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._last_snapshot = {}
+        self.published = 0
+
+    def publish(self, snapshot):
+        # An entry that was only re-fetched, with the same price, is not a change
+        changes = {
+            pair: entry for pair, entry in snapshot.items()
+            if _quote(self._last_snapshot.get(pair)) != _quote(entry)
+        }
+        self._last_snapshot = snapshot
+        if not changes:
+            return
+        self.published += 1
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.offer(changes)
+
+    def subscribe(self, pairs):
+        return self.add(Subscription(pairs))
+
+    def add(self, subscription):
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscriptions),
+                'diffs_published': self.published,
+            }
+
+
+def sse_event(event, data):
+    """Formats one server-sent event."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
@@ -0,0 +1,389 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import yfinance as yf
+    from yfinance import shared as yf_shared
+except ImportError:  # Replay mode works without yfinance
+    yf = yf_shared = None
+
+# Lookback periods understood by the replay provider
+REPLAY_PERIODS = {
+    '1d': pd.Timedelta(days=1),
+    '5d': pd.Timedelta(days=5),
+    '7d': pd.Timedelta(days=7),
+    '1mo': pd.Timedelta(days=30),
+    '3mo': pd.Timedelta(days=90),
+    '6mo': pd.Timedelta(days=182),
+    '1y': pd.Timedelta(days=365),
+}
+
+# How many calls each provider may have in flight at once (FOREX_PROVIDER_CONCURRENCY overrides)
+PROVIDER_CONCURRENCY = {
+    'yfinance': 4,
+    'record': 4,
+    'replay': 16,
+}
+
+
+class MarketDataProvider:
+    """Source of OHLCV bars and quote metadata.
+
+    download() returns a dict of ticker -> frame with Open/High/Low/Close/
+    Adj Close/Volume columns and a DatetimeIndex; tickers the provider knows
+    nothing about are left out.
+    """
+
+    name = 'base'
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        raise NotImplementedError
+
+    def info(self, ticker):
+        """Returns the quote metadata dict for a ticker (may be empty)."""
+        raise NotImplementedError
+
+    def last_price(self, ticker):
+        """Returns the latest price for a ticker, or None, using the cheapest call the provider has."""
+        return quote_price(self.info(ticker))
+
+
+class ProviderRateLimitError(Exception):
+    """The provider throttled some of the tickers in a call; the whole call should be retried later."""
+
+
+class _ErrorLog(logging.Handler):
+    """Collects the per-ticker failures yfinance logs instead of raising, for one call's tickers.
+
+    The yfinance logger is shared by every download in flight, so only
+    records logged on the calling thread that name one of tickers count;
+    yfinance logs them as "['EURUSD=X', ...]: <error>".
+    """
+
+    def __init__(self, tickers):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.names = [f"'{ticker}'" for ticker in tickers]
+        self.messages = []
+
+    def emit(self, record):
+        if record.thread != self.thread:
+            return
+        message = record.getMessage()
+        if any(name in message for name in self.names):
+            self.messages.append(message)
+
+
+def _is_throttle_message(message):
+    return 'RateLimit' in message or 'Too Many Requests' in message
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = 'yfinance'
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        params = {'interval': interval}
+        if start:
+            params['start'] = start
+            if end:
+                params['end'] = end
+        else:
+            params['period'] = period
+
+        # yf.download never raises for a ticker that failed, throttling included: it logs the
+        # error (and on 0.2.x also keeps it in yfinance.shared._ERRORS) and returns no rows for it
+        error_log = _ErrorLog(tickers)
+        logger = logging.getLogger('yfinance')
+        logger.addHandler(error_log)
+        try:
+            data = yf.download(
+                tickers=tickers,
+                **params,
+                group_by='ticker',
+                auto_adjust=auto_adjust,
+                threads=True,
+                progress=False
+            )
+        finally:
+            logger.removeHandler(error_log)
+        errors = error_log.messages + [
+            str(error) for ticker, error in getattr(yf_shared, '_ERRORS', {}).items() if ticker in tickers
+        ]
+        throttled = [message for message in errors if _is_throttle_message(message)]
+        if throttled:
+            raise ProviderRateLimitError(f'Rate limited by yfinance: {throttled[0]}')
+
+        frames = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frame = data[ticker]
+            else:
+                frame = data
+            # Multi-ticker downloads share one index, so drop rows that belong to other tickers only
+            frames[ticker] = frame.dropna(how='all')
+        return frames
+
+    def info(self, ticker):
+        return yf.Ticker(ticker).info or {}
+
+    def last_price(self, ticker):
+        # fast_info reads the chart metadata, far cheaper than the quote summary behind info
+        try:
+            return yf.Ticker(ticker).fast_info.last_price
+        except KeyError:
+            return None
+
+
+def quote_price(info):
+    """Picks a price out of a quote metadata dict; providers fill in different fields."""
+    return info.get('regularMarketPrice') or info.get('lastPrice') or info.get('bid') or info.get('ask')
+
+
+def _utc(value):
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize('UTC') if timestamp.tz is None else timestamp.tz_convert('UTC')
+
+
+def _fixture_name(ticker):
+    return re.sub(r'[^A-Za-z0-9=^._-]', '_', ticker)
+
+
+class FixtureStore:
+    """Reads and writes provider fixtures: one CSV of bars per (ticker, interval, adjusted) and one JSON per info."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def bars_path(self, ticker, interval, auto_adjust):
+        suffix = '-adj' if auto_adjust else ''
+        return os.path.join(self.root, 'bars', interval, f'{_fixture_name(ticker)}{suffix}.csv')
+
+    def info_path(self, ticker):
+        return os.path.join(self.root, 'info', f'{_fixture_name(ticker)}.json')
+
+    def load_bars(self, ticker, interval, auto_adjust):
+        path = self.bars_path(ticker, interval, auto_adjust)
+        if not os.path.exists(path):
+            return None
+        frame = pd.read_csv(path, index_col=0)
+        frame.index = pd.to_datetime(frame.index, utc=True)
+        frame.index.name = 'Datetime'
+        return frame
+
+    def save_bars(self, ticker, interval, auto_adjust, frame):
+        existing = self.load_bars(ticker, interval, auto_adjust)
+        if frame.index.tz is None:
+            frame = frame.tz_localize('UTC')
+        if existing is not None:
+            frame = pd.concat([existing, frame.tz_convert('UTC')])
+            frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        path = self.bars_path(ticker, interval, auto_adjust)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frame.to_csv(path)
+
+    def load_info(self, ticker):
+        path = self.info_path(ticker)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save_info(self, ticker, info):
+        path = self.info_path(ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(info, f, default=str)
+
+
+class RecordingProvider(MarketDataProvider):
+    """Passes calls through to another provider and saves every response as a fixture."""
+
+    name = 'record'
+
+    def __init__(self, inner, fixture_dir):
+        self.inner = inner
+        self.fixtures = FixtureStore(fixture_dir)
+        self._lock = threading.Lock()
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        frames = self.inner.download(tickers, interval, start=start, end=end, period=period, auto_adjust=auto_adjust)
+        with self._lock:
+            for ticker, frame in frames.items():
+                if not frame.empty:
+                    self.fixtures.save_bars(ticker, interval, auto_adjust, frame)
+        return frames
+
+    def info(self, ticker):
+        info = self.inner.info(ticker)
+        with self._lock:
+            self.fixtures.save_info(ticker, info)
+        return info
+
+    def last_price(self, ticker):
+        price = self.inner.last_price(ticker)
+        if price is not None:
+            with self._lock:
+                info = self.fixtures.load_info(ticker) or {}
+                info['lastPrice'] = price
+                self.fixtures.save_info(ticker, info)
+        return price
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serves recorded fixtures from disk with an injected per-call latency.
+
+    Fixture bars are shifted forward by whole weeks so the newest bar falls in
+    the last week, which keeps weekday and session structure intact while
+    making old recordings look current. Periods are measured back from the
+    newest bar, so replies are deterministic for a given fixture set.
+    """
+
+    name = 'replay'
+
+    def __init__(self, fixture_dir, latency_seconds=0.0, align_to_now=True):
+        self.fixtures = FixtureStore(fixture_dir)
+        self.latency_seconds = latency_seconds
+        self.align_to_now = align_to_now
+        self._frames = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _load(self, ticker, interval, auto_adjust):
+        key = (ticker, interval, auto_adjust)
+        with self._lock:
+            if key not in self._frames:
+                frame = self.fixtures.load_bars(ticker, interval, auto_adjust)
+                if frame is not None and not frame.empty and self.align_to_now:
+                    week = pd.Timedelta(weeks=1)
+                    frame = frame.copy()
+                    frame.index = frame.index + ((pd.Timestamp.now(tz='UTC') - frame.index[-1]) // week) * week
+                self._frames[key] = frame
+            return self._frames[key]
+
+    def _delay(self):
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        self._delay()
+        frames = {}
+        for ticker in tickers:
+            frame = self._load(ticker, interval, auto_adjust)
+            if frame is None:
+                continue
+            if start:
+                frame = frame[frame.index >= _utc(start)]
+                if end:
+                    frame = frame[frame.index < _utc(end)]
+            elif period in REPLAY_PERIODS and not frame.empty:
+                frame = frame[frame.index > frame.index[-1] - REPLAY_PERIODS[period]]
+            # Callers may modify what they get back, the loaded fixture must stay intact
+            frames[ticker] = frame.copy()
+        return frames
+
+    def info(self, ticker):
+        self._delay()
+        return self.fixtures.load_info(ticker) or {}
+
+    def last_price(self, ticker):
+        self._delay()
+        price = quote_price(self.fixtures.load_info(ticker) or {})
+        if price is None:
+            frame = self._load(ticker, '1m', True)
+            if frame is not None and not frame.empty:
+                price = frame['Close'].iloc[-1]
+        return price
+
+
+class ConcurrencyLimitedProvider(MarketDataProvider):
+    """Caps the number of calls in flight to another provider; extra callers wait their turn."""
+
+    def __init__(self, inner, max_concurrent):
+        self.inner = inner
+        self.name = inner.name
+        self.max_concurrent = max_concurrent
+        # Called as observer(operation, tickers, seconds, result, error) after every call
+        self.observer = None
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def _call(self, fn, *args, **kwargs):
+        with self._lock:
+            self.waiting += 1
+        with self._slots:
+            with self._lock:
+                self.waiting -= 1
+                self.in_flight += 1
+            started = time.perf_counter()
+            result = error = None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                if self.observer is not None:
+                    self.observer(fn.__name__, args[0], time.perf_counter() - started, result, error)
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        return self._call(self.inner.download, tickers, interval, start=start, end=end, period=period, auto_adjust=auto_adjust)
+
+    def info(self, ticker):
+        return self._call(self.inner.info, ticker)
+
+    def last_price(self, ticker):
+        return self._call(self.inner.last_price, ticker)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'provider': self.name,
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+            }
+
+
+def create_provider(name=None, fixture_dir=None, latency_seconds=None, max_concurrent=None):
+    """Builds the provider selected by arguments or FOREX_PROVIDER / FOREX_FIXTURE_DIR / FOREX_REPLAY_LATENCY_MS.
+
+    Calls are capped at max_concurrent in flight, by default FOREX_PROVIDER_CONCURRENCY
+    or the provider's entry in PROVIDER_CONCURRENCY.
+    """
+    name = name or os.environ.get('FOREX_PROVIDER', 'yfinance')
+    fixture_dir = fixture_dir or os.environ.get(
+        'FOREX_FIXTURE_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fixtures')
+    )
+    if latency_seconds is None:
+        latency_seconds = float(os.environ.get('FOREX_REPLAY_LATENCY_MS', 0)) / 1000
+
+    if name == 'yfinance':
+        provider = YFinanceProvider()
+    elif name == 'record':
+        provider = RecordingProvider(YFinanceProvider(), fixture_dir)
+    elif name == 'replay':
+        provider = ReplayProvider(fixture_dir, latency_seconds=latency_seconds)
+    else:
+        raise ValueError(f'Unknown market data provider "{name}".')
+
+    if max_concurrent is None:
+        max_concurrent = int(os.environ.get('FOREX_PROVIDER_CONCURRENCY', PROVIDER_CONCURRENCY[name]))
+    return ConcurrencyLimitedProvider(provider, max_concurrent)
@@ -0,0 +1,160 @@
+import atexit
+import threading
+import time
+
+
+class PriceRefresher:
+    """Keeps a price snapshot fresh on a background thread.
+
+    Readers always get the last good snapshot together with the time it was
+    taken; a failed refresh leaves the previous snapshot in place.
+
+    With a SharedStore, worker processes on the host elect one leader through
+    a lease: only the leader fetches and publishes its snapshot, the others
+    poll the store and adopt it. A follower that has nothing to adopt yet,
+    e.g. on a cold start of every worker, fetches for itself rather than
+    serve nothing. The leader gives up its lease when it stops or exits.
+    """
+
+    def __init__(self, fetch, interval_seconds, max_staleness_seconds, shared=None, name='price-snapshot', owner=None):
+        self.fetch = fetch
+        self.interval_seconds = interval_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self.shared = shared
+        self.name = name
+        self.owner = owner
+        # A leader that stops renewing is replaced after missing a few refreshes
+        self.lease_seconds = 3 * interval_seconds
+        self.poll_seconds = min(interval_seconds, 5)
+        self.is_leader = shared is None
+        self.snapshot = {}
+        self.snapshot_time = 0
+        self.refresh_count = 0
+        self.error_count = 0
+        self.last_error = None
+        self.last_duration = None
+        self.listeners = []
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def start(self):
+        """Starts the background thread once; later calls are no-ops."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='price-refresher', daemon=True)
+                self._thread.start()
+                if self.shared is not None:
+                    atexit.register(self.release)
+
+    def add_listener(self, listener):
+        """Registers a callable that receives every new snapshot."""
+        self.listeners.append(listener)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self.release()
+
+    def release(self):
+        """Hands the lease back so another worker takes over at once instead of after it expires."""
+        if self.shared is not None and self.is_leader:
+            self.shared.release_lease(self.name, self.owner)
+            self.is_leader = False
+
+    def wake(self):
+        """Makes the background thread refresh now instead of at the end of its interval."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._wake.wait(self.interval_seconds if self.is_leader else self.poll_seconds)
+            self._wake.clear()
+
+    def refresh(self):
+        """Fetches a new snapshot unless another thread is already doing so."""
+        if not self._refresh_lock.acquire(blocking=False):
+            # A refresh is already running; wait for it instead of starting another
+            with self._refresh_lock:
+                return
+        try:
+            if self.shared is not None:
+                self.is_leader = self.shared.acquire_lease(self.name, self.owner, self.lease_seconds)
+                if not self.is_leader:
+                    self._adopt_shared()
+                    if self.snapshot:
+                        return
+                    # Nothing published yet: fetch for this worker alone, leaving publishing to the leader
+            started = time.time()
+            try:
+                snapshot = self.fetch()
+            except Exception as e:
+                self.error_count += 1
+                self.last_error = str(e)
+                print(f"Error refreshing price snapshot: {str(e)}")
+                return
+            self.snapshot = snapshot
+            self.snapshot_time = time.time()
+            self.refresh_count += 1
+            self.last_error = None
+            self.last_duration = self.snapshot_time - started
+            if self.is_leader and self.shared is not None:
+                self.shared.set(self.name, (snapshot, self.snapshot_time), self.lease_seconds + self.max_staleness_seconds)
+            self._notify(snapshot)
+        finally:
+            self._refresh_lock.release()
+
+    def _adopt_shared(self):
+        """Takes over the leader's snapshot from the shared store if it is newer than ours."""
+        entry = self.shared.get(self.name)
+        if entry is None:
+            return
+        snapshot, snapshot_time = entry
+        if snapshot_time > self.snapshot_time:
+            self.snapshot = snapshot
+            self.snapshot_time = snapshot_time
+            self._notify(snapshot)
+
+    def _notify(self, snapshot):
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Error in price snapshot listener: {str(e)}")
+
+    def age(self):
+        """Returns the snapshot age in seconds, or None before the first refresh."""
+        if not self.snapshot_time:
+            return None
+        return time.time() - self.snapshot_time
+
+    def get(self):
+        """Returns (snapshot, age_seconds); only blocks on a refresh while there is no snapshot at all.
+
+        Past the staleness bound the stale snapshot is still returned, and the
+        background thread is woken to retry, so a provider outage never makes
+        readers wait on it.
+        """
+        self.start()
+        if not self.snapshot:
+            self.refresh()
+        elif self.age() > self.max_staleness_seconds:
+            self.wake()
+        return self.snapshot, self.age()
+
+    def stats(self):
+        age = self.age()
+        return {
+            'entries': len(self.snapshot),
+            'age_seconds': round(age, 3) if age is not None else None,
+            'refresh_interval_seconds': self.interval_seconds,
+            'max_staleness_seconds': self.max_staleness_seconds,
+            'role': 'leader' if self.is_leader else 'follower',
+            'refreshes': self.refresh_count,
+            'errors': self.error_count,
+            'last_error': self.last_error,
+            'last_duration_seconds': round(self.last_duration, 3) if self.last_duration is not None else None,
+        }
@@ -0,0 +1,96 @@
+import re
+
+import pandas as pd
+
+# Intervals yfinance serves directly, smallest first
+NATIVE_INTERVALS = {
+    '1m': pd.Timedelta(minutes=1),
+    '2m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(days=1),
+    '1wk': pd.Timedelta(weeks=1),
+}
+CALENDAR_INTERVALS = ['1mo']
+
+TIMEFRAME_UNITS = {
+    'm': 'minutes',
+    'min': 'minutes',
+    'h': 'hours',
+    'd': 'days',
+    'wk': 'weeks',
+    'w': 'weeks',
+}
+
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Adj Close': 'last',
+    'Volume': 'sum',
+}
+
+
+def parse_timeframe(timeframe):
+    """Parses a timeframe such as '3m', '4h' or '12h' into a Timedelta, or None if invalid."""
+    match = re.fullmatch(r'(\d+)(min|m|h|d|wk|w)', timeframe.strip().lower())
+    if not match:
+        return None
+    amount = int(match.group(1))
+    if amount <= 0:
+        return None
+    return pd.Timedelta(**{TIMEFRAME_UNITS[match.group(2)]: amount})
+
+
+def plan_timeframe(timeframe):
+    """Returns (native_interval, bucket) for a requested timeframe.
+
+    bucket is None when yfinance serves the timeframe directly, otherwise it is
+    the Timedelta the native bars must be resampled into. The native interval
+    is the largest one that divides the requested timeframe evenly. Returns
+    (None, None) for timeframes that cannot be built.
+    """
+    if timeframe in NATIVE_INTERVALS or timeframe in CALENDAR_INTERVALS:
+        return timeframe, None
+
+    target = parse_timeframe(timeframe)
+    if target is None:
+        return None, None
+    for interval, length in reversed(NATIVE_INTERVALS.items()):
+        if length == target:
+            return interval, None
+        if length < target and target % length == pd.Timedelta(0):
+            return interval, target
+    return None, None
+
+
+def resample_bars(frame, bucket, offset=pd.Timedelta(0)):
+    """Aggregates OHLCV bars into fixed-width buckets.
+
+    Buckets are aligned to UTC midnight shifted by offset, so for example an
+    offset of 22h makes 4h and daily buckets start at the 17:00 New York roll.
+    Buckets with no bars (weekends, holidays) are dropped.
+    """
+    if frame.empty:
+        return frame
+
+    index = frame.index
+    if index.tz is None:
+        frame = frame.tz_localize('UTC')
+    else:
+        frame = frame.tz_convert('UTC')
+
+    aggregation = {column: how for column, how in OHLCV_AGGREGATION.items() if column in frame.columns}
+    resampled = frame.resample(
+        bucket,
+        origin='epoch',
+        offset=offset % pd.Timedelta(days=1),
+        label='left',
+        closed='left'
+    ).agg(aggregation)
+    resampled = resampled.dropna(subset=['Open'])
+    resampled.index.name = index.name
+    return resampled
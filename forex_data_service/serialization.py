@@ -0,0 +1,142 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional
+    pa = None
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+COLUMNAR_MIMETYPE = 'application/vnd.ohlcv.columnar+json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Source column in the bar frame -> name in responses
+VALUE_COLUMNS = [
+    ('Open', 'open'),
+    ('High', 'high'),
+    ('Low', 'low'),
+    ('Close', 'close'),
+    ('Volume', 'volume'),
+]
+
+
+def frame_columns(frame):
+    """Returns a bar frame as parallel arrays: int64 epoch-second times and float64 values."""
+    index = frame.index
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    columns = {'time': index.tz_convert('UTC').as_unit('ns').asi8 // 1_000_000_000}
+    for source, name in VALUE_COLUMNS:
+        if source in frame.columns:
+            columns[name] = frame[source].to_numpy(dtype='float64', na_value=np.nan)
+    return columns
+
+
+def empty_columns():
+    columns = {'time': np.empty(0, dtype='int64')}
+    for _, name in VALUE_COLUMNS:
+        columns[name] = np.empty(0, dtype='float64')
+    return columns
+
+
+def slice_columns(columns, since):
+    """Returns only the bars whose time is at or after since (epoch seconds)."""
+    first = int(np.searchsorted(columns['time'], since, side='left'))
+    return {name: values[first:] for name, values in columns.items()}
+
+
+def columns_etag(columns, *parts):
+    """Returns a validator that changes whenever any bar, or any of parts, changes."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(parts).encode())
+    for name in sorted(columns):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(columns[name]).tobytes())
+    return digest.hexdigest()
+
+
+def _json_array(values):
+    if values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            # NaN is not valid JSON
+            listed = values.astype(object)
+            listed[missing] = None
+            return listed.tolist()
+    return values.tolist()
+
+
+def columns_to_json(columns):
+    """Returns parallel column arrays as JSON-ready lists, with NaN as null."""
+    return {name: _json_array(values) for name, values in columns.items()}
+
+
+def format_times(times):
+    """Formats epoch-second times as 'YYYY-MM-DD HH:MM:SS' strings without per-element Python calls."""
+    strings = np.datetime_as_string(times.astype('datetime64[s]'), unit='s')
+    if len(strings):
+        # Swap the ISO 'T' separator for a space in place
+        strings.view('<U1').reshape(len(strings), -1)[:, 10] = ' '
+    return strings
+
+
+def columns_to_records_json(columns):
+    """Encodes columns as a JSON array of bar records, with NaN as null."""
+    data = {'time': format_times(columns['time'])}
+    for _, name in VALUE_COLUMNS:
+        if name in columns:
+            data[name] = columns[name]
+    return pd.DataFrame(data).to_json(orient='records', double_precision=15)
+
+
+def records_by_pair_json(columns_by_pair):
+    """Encodes columns for several pairs as one JSON object of record arrays."""
+    parts = [
+        f'{json.dumps(pair)}:{columns_to_records_json(columns)}'
+        for pair, columns in columns_by_pair.items()
+    ]
+    return '{' + ','.join(parts) + '}'
+
+
+def pair_ndjson_line(pair, columns=None, error=None):
+    """Encodes one pair's bars, or an error for it, as a newline-terminated JSON line."""
+    if error is not None:
+        return f'{json.dumps({"pair": pair, "error": error})}\n'
+    return f'{{"pair":{json.dumps(pair)},"bars":{columns_to_records_json(columns)}}}\n'
+
+
+def arrow_available():
+    return pa is not None
+
+
+def columns_to_arrow(columns_by_pair):
+    """Encodes columns for one or more pairs as a single Arrow IPC stream.
+
+    Rows of all pairs are concatenated, with a dictionary-encoded 'pair' column
+    telling them apart.
+    """
+    pairs = list(columns_by_pair)
+    lengths = [len(columns_by_pair[pair]['time']) for pair in pairs]
+    names = ['time'] + [name for _, name in VALUE_COLUMNS]
+
+    arrays = [pa.DictionaryArray.from_arrays(
+        pa.array(np.repeat(np.arange(len(pairs), dtype='int32'), lengths)),
+        pa.array(pairs, type=pa.string())
+    )]
+    for name in names:
+        dtype = 'int64' if name == 'time' else 'float64'
+        parts = [
+            columns_by_pair[pair].get(name, np.full(length, np.nan))
+            for pair, length in zip(pairs, lengths)
+        ]
+        values = np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(0, dtype=dtype)
+        arrays.append(pa.array(values, from_pandas=True))
+
+    table = pa.Table.from_arrays(arrays, names=['pair'] + names)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
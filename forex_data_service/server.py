@@ -1,61 +1,432 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-import yfinance as yf
 import pandas as pd
+import os
+import threading
 import time
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from bar_store import BarStore
+from cache import TTLCache
+from chunked_fetch import PROVIDER_LOOKBACKS, clamp_start, download_chunked
+from compression import COMPRESSIBLE_MIMETYPES, body_digest, choose_encoding, compress, compress_stream
+from fetch_scheduler import create_scheduler
+from indicators import IndicatorSeries, parse_indicators
+from market_hours import MarketCalendar
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+from price_stream import PriceBroadcaster, sse_event
+from providers import create_provider
+from refresher import PriceRefresher
+from resample import plan_timeframe, resample_bars
+from serialization import (
+    ARROW_MIMETYPE, COLUMNAR_MIMETYPE, NDJSON_MIMETYPE, arrow_available, columns_to_arrow, columns_to_json,
+    columns_etag, columns_to_records_json, empty_columns, frame_columns, pair_ndjson_line, records_by_pair_json,
+    slice_columns
+)
+from shared_cache import WORKER_ID, SharedStore, TieredCache
+from singleflight import SingleFlight
+from symbols import INSTRUMENTS_BY_ID, get_instrument, resolve_symbol
+from triangulation import Triangulator
+from universe import SymbolUniverse
+from warm_start import CacheSnapshotter
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['Age', 'X-Snapshot-Age', 'Warning', 'ETag', 'X-Price-Source', 'X-Range-Start'])
 
-# Cache setup
-cache = {}
-cache_timestamp = 0
-CACHE_DURATION_SECONDS = 60  # Cache for 60 seconds
+# Prometheus metrics, served at /metrics
+metrics = Registry()
+request_seconds = metrics.histogram(
+    'forex_request_duration_seconds', 'Time until the response is ready, per route; streamed bodies are not included.',
+    ['route', 'method', 'status']
+)
+stage_seconds = metrics.histogram(
+    'forex_request_stage_seconds', 'Time spent per request stage: fetch, transform, serialize or compress.',
+    ['route', 'stage']
+)
+provider_seconds = metrics.histogram('forex_provider_call_duration_seconds', 'Provider call latency.', ['operation'])
+provider_ticker_calls = metrics.counter('forex_provider_ticker_calls', 'Provider calls that included a ticker.', ['ticker'])
+provider_ticker_seconds = metrics.counter(
+    'forex_provider_ticker_seconds', 'Summed latency of the provider calls that included a ticker.', ['ticker']
+)
+provider_errors = metrics.counter(
+    'forex_provider_errors', 'Provider failures per ticker; kind is "exception" or "no_data".', ['ticker', 'kind']
+)
 
-def format_symbol_for_yfinance(symbol):
-    """Formats a trading symbol into a yfinance-compatible ticker."""
-    symbol = symbol.upper()
-    
-    # Mapping for common indices and commodities
-    special_symbols = {
-        'US30': '^DJI',
-        'SPX500': '^GSPC',
-        'NAS100': '^IXIC',
-        'XAU/USD': 'GC=F',
-        'XAUUSD': 'GC=F',
-        'XAG/USD': 'SI=F',
-        'XAGUSD': 'SI=F',
-        'USOIL': 'CL=F',
-    }
-    if symbol in special_symbols:
-        return special_symbols[symbol]
-
-    if '/' in symbol:
-        # Forex pair
-        return f"{symbol.replace('/', '')}=X"
-    if symbol.endswith('USDT'):
-        # Crypto pair
-        return f"{symbol.replace('USDT', '')}-USD"
-    
-    return symbol
+# Default alignment of resampled buckets relative to UTC midnight
+SESSION_OFFSET = os.environ.get('FOREX_SESSION_OFFSET', '0h')
+
+# OHLCV response formats: records (default), parallel arrays, Arrow IPC, or one JSON line per pair
+RESPONSE_FORMATS = ['json', 'columnar', 'arrow', 'ndjson']
+SINGLE_RESPONSE_FORMATS = ['json', 'columnar', 'arrow']
+
+# Bulk price snapshot, refreshed in the background and served with its age
+PRICE_REFRESH_SECONDS = int(os.environ.get('FOREX_PRICE_REFRESH_SECONDS', 60))
+PRICE_MAX_STALENESS_SECONDS = int(os.environ.get('FOREX_PRICE_MAX_STALENESS_SECONDS', 300))
+STREAM_HEARTBEAT_SECONDS = int(os.environ.get('FOREX_STREAM_HEARTBEAT_SECONDS', 15))
+# Symbols always kept in the price snapshot (FOREX_PRICE_UNIVERSE), whether requested or not
+ALL_KNOWN_SYMBOLS = [
+  'XAU/USD', 'XAG/USD', 'EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD',
+  'EUR/JPY', 'GBP/JPY', 'CHF/JPY', 'AUD/JPY', 'CAD/JPY', 'NZD/JPY', 'EUR/GBP',
+  'EUR/CHF', 'EUR/AUD', 'EUR/CAD', 'EUR/NZD', 'GBP/AUD', 'GBP/CAD', 'GBP/NZD',
+  'AUD/CHF', 'AUD/CAD', 'AUD/NZD', 'CAD/CHF', 'NZD/CHF', 'NZD/CAD'
+]
+
+PRICE_UNIVERSE = os.environ.get('FOREX_PRICE_UNIVERSE', ','.join(ALL_KNOWN_SYMBOLS)).split(',')
+# Symbols clients request join the universe and refresh by tier: (name, requested within, refresh every)
+PRICE_UNIVERSE_TIERS = [
+    ('hot', 5 * 60, PRICE_REFRESH_SECONDS),
+    ('warm', 60 * 60, 5 * PRICE_REFRESH_SECONDS),
+    ('cold', float('inf'), 15 * PRICE_REFRESH_SECONDS),
+]
+PRICE_UNIVERSE_DROP_SECONDS = 24 * 3600
+PRICE_UNIVERSE_MAX_SYMBOLS = int(os.environ.get('FOREX_PRICE_UNIVERSE_MAX_SYMBOLS', 200))
+symbol_universe = SymbolUniverse(
+    [resolve_symbol(symbol).id for symbol in PRICE_UNIVERSE],
+    PRICE_UNIVERSE_TIERS, PRICE_UNIVERSE_DROP_SECONDS, PRICE_UNIVERSE_MAX_SYMBOLS
+)
+
+# Responses at least this large are gzip/brotli compressed; compressed bodies are cached by content digest
+COMPRESSION_MIN_BYTES = int(os.environ.get('FOREX_COMPRESSION_MIN_BYTES', 1024))
+COMPRESSED_CACHE_MAX_BYTES = int(os.environ.get('FOREX_COMPRESSED_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+COMPRESSED_CACHE_TTL_SECONDS = 60
+compressed_cache = TTLCache(COMPRESSED_CACHE_MAX_BYTES)
+
+# Single-pair quotes fetched on a miss, for pairs outside the bulk snapshot
+QUOTE_TTL_SECONDS = 15
+quote_cache = TTLCache(1024 * 1024)
+
+# Market data provider: yfinance, or record/replay of local fixtures (FOREX_PROVIDER)
+provider = create_provider()
+
+# Per-ticker metrics are labelled for registry instruments only; any ticker a client makes up
+# is counted under 'other', so the number of series stays bounded
+METRIC_TICKERS = {instrument.provider_ticker for instrument in INSTRUMENTS_BY_ID.values()}
+
+def record_provider_call(operation, tickers, seconds, result, error):
+    """Provider observer: latency per call and per ticker, and failures per ticker."""
+    provider_seconds.observe(seconds, operation=operation)
+    for ticker in [tickers] if isinstance(tickers, str) else tickers:
+        label = ticker if ticker in METRIC_TICKERS else 'other'
+        provider_ticker_calls.inc(ticker=label)
+        provider_ticker_seconds.inc(seconds, ticker=label)
+        if error is not None:
+            provider_errors.inc(ticker=label, kind='exception')
+        elif operation == 'download' and (ticker not in result or result[ticker].empty):
+            provider_errors.inc(ticker=label, kind='no_data')
+        elif operation != 'download' and not result:
+            provider_errors.inc(ticker=label, kind='no_data')
+
+provider.observer = record_provider_call
+
+# Concurrent downloads with the same interval and range are merged into one multi-ticker call
+FETCH_BATCH_WINDOW_SECONDS = int(os.environ.get('FOREX_FETCH_BATCH_WINDOW_MS', 25)) / 1000
+FETCH_BATCH_MAX_TICKERS = int(os.environ.get('FOREX_FETCH_BATCH_MAX_TICKERS', 50))
+fetch_scheduler = create_scheduler(provider, FETCH_BATCH_WINDOW_SECONDS, FETCH_BATCH_MAX_TICKERS)
+
+# Date ranges longer than one provider request allows are fetched as chunks on this pool
+CHUNK_FETCH_WORKERS = int(os.environ.get('FOREX_CHUNK_FETCH_WORKERS', 4))
+chunk_executor = ThreadPoolExecutor(max_workers=CHUNK_FETCH_WORKERS, thread_name_prefix='chunk-fetch')
+
+# SQLite file shared by the worker processes on this host; empty disables sharing
+SHARED_CACHE_PATH = os.environ.get(
+    'FOREX_SHARED_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'shared_cache.sqlite')
+)
+shared_store = SharedStore(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
+
+# OHLCV history cache, keyed on (ticker, interval, start, end, period)
+HISTORY_CACHE_MAX_BYTES = int(os.environ.get('FOREX_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+history_cache = TTLCache(HISTORY_CACHE_MAX_BYTES)
+if shared_store is not None:
+    # A frame one worker fetched is served by the others without another provider call
+    history_cache = TieredCache(history_cache, shared_store, 'history')
+
+# How long fetched bars stay fresh, per yfinance interval
+HISTORY_TTL_SECONDS = {
+    '1m': 30,
+    '2m': 60,
+    '5m': 120,
+    '15m': 300,
+    '30m': 600,
+    '1h': 900,
+    '1d': 3600,
+    '1wk': 6 * 3600,
+    '1mo': 12 * 3600,
+}
+DEFAULT_HISTORY_TTL_SECONDS = 300
+
+# Trading sessions per asset class; closed markets are not refreshed and their data is cached until the next open
+MARKET_HOURS_ENABLED = os.environ.get('FOREX_MARKET_HOURS', '1') == '1'
+market_calendar = MarketCalendar(MARKET_HOURS_ENABLED)
+
+def history_ttl(instrument_id, interval):
+    """Returns how long fetched bars stay fresh, given the interval and whether the market is open."""
+    ttl = HISTORY_TTL_SECONDS.get(interval, DEFAULT_HISTORY_TTL_SECONDS)
+    return market_calendar.ttl(get_instrument(instrument_id).asset_class, ttl)
+
+# Crosses of the majors are derived from their USD legs instead of downloaded, when enabled;
+# authoritative pairs are always downloaded directly
+TRIANGULATE_CROSSES = os.environ.get('FOREX_TRIANGULATE_CROSSES', '0') == '1'
+AUTHORITATIVE_PAIRS = [pair for pair in os.environ.get('FOREX_AUTHORITATIVE_PAIRS', '').split(',') if pair]
+triangulator = Triangulator(TRIANGULATE_CROSSES, [resolve_symbol(pair).id for pair in AUTHORITATIVE_PAIRS])
+
+# Concurrent identical history fetches share one provider call
+history_flight = SingleFlight()
+
+# On-disk bar store backing the default lookback windows, survives restarts
+BAR_STORE_DIR = os.environ.get('FOREX_BAR_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars'))
+bar_store = BarStore(BAR_STORE_DIR)
+
+# Indicator values per (instrument, timeframe, offset, indicators), updated incrementally as bars arrive
+INDICATOR_CACHE_MAX_BYTES = int(os.environ.get('FOREX_INDICATOR_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+INDICATOR_TTL_SECONDS = 3600
+DEFAULT_INDICATORS = 'sma:20,ema:20,rsi:14'
+indicator_cache = TTLCache(INDICATOR_CACHE_MAX_BYTES)
+indicator_lock = threading.Lock()
+
+# Lookback periods served from the bar store
+PERIOD_LENGTHS = {
+    '1d': pd.Timedelta(days=1),
+    '5d': pd.Timedelta(days=5),
+    '7d': pd.Timedelta(days=7),
+    '1mo': pd.Timedelta(days=30),
+    '3mo': pd.Timedelta(days=90),
+}
 
 def get_yfinance_interval(timeframe):
     """Maps frontend timeframe to a valid yfinance interval."""
     timeframe_map = {
         '1m': '1m',
-        '3m': '2m',  # yfinance doesn't have '3m', falling back to '2m'
         '5m': '5m',
         '15m': '15m',
         '30m': '30m',
         '1h': '1h',
-        '4h': '1h',  # yfinance doesn't have '4h', we can aggregate later if needed
         '1d': '1d',
         '1wk': '1wk',
         '1mo': '1mo',
     }
     return timeframe_map.get(timeframe, '1h') # Default to '1h' if not found
 
+def resolve_timeframe(timeframe):
+    """Returns the yfinance interval to fetch for a timeframe and the bucket to resample it into.
+
+    Timeframes yfinance lacks, such as '3m', '4h' or '12h', are built from the
+    largest native interval that divides them; bucket is None for native ones.
+    """
+    interval, bucket = plan_timeframe(timeframe)
+    if interval is None:
+        return get_yfinance_interval(timeframe), None
+    return interval, bucket
+
+def get_session_offset():
+    """Reads the resample bucket offset from the request, e.g. '22h' for the 17:00 New York roll."""
+    return pd.Timedelta(request.args.get('session_offset', SESSION_OFFSET))
+
+def get_since():
+    """Reads the 'since' cursor as epoch seconds; accepts epoch seconds or a UTC date/time string."""
+    since = request.args.get('since')
+    if since is None:
+        return None
+    if since.isdigit():
+        return int(since)
+    timestamp = pd.Timestamp(since)
+    if timestamp.tz is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.value // 1_000_000_000
+
+def get_response_format():
+    """Picks the OHLCV response format from the 'format' parameter or the Accept header."""
+    response_format = request.args.get('format')
+    if response_format is None:
+        # The body now depends on Accept, so caches must key on it too
+        g.negotiated_format = True
+        best = request.accept_mimetypes.best_match(
+            ['application/json', COLUMNAR_MIMETYPE, ARROW_MIMETYPE, NDJSON_MIMETYPE], default='application/json'
+        )
+        response_format = {
+            COLUMNAR_MIMETYPE: 'columnar',
+            ARROW_MIMETYPE: 'arrow',
+            NDJSON_MIMETYPE: 'ndjson',
+        }.get(best, 'json')
+    return response_format.lower()
+
+def check_response_format(response_format, formats=RESPONSE_FORMATS):
+    """Returns an error response if the format cannot be produced, otherwise None."""
+    if response_format not in formats:
+        return jsonify({'error': f'Unsupported format "{response_format}". Use one of: {", ".join(formats)}.'}), 400
+    if response_format == 'arrow' and not arrow_available():
+        return jsonify({'error': 'Arrow output requires pyarrow, which is not installed.'}), 406
+    return None
+
+def columns_response(columns_by_pair, response_format, single=False):
+    """Builds a records JSON, columnar JSON or Arrow response from per-pair column arrays."""
+    if response_format == 'arrow':
+        return Response(columns_to_arrow(columns_by_pair), mimetype=ARROW_MIMETYPE)
+    if response_format == 'json':
+        if single:
+            body = columns_to_records_json(next(iter(columns_by_pair.values())))
+        else:
+            body = records_by_pair_json(columns_by_pair)
+        return Response(body, mimetype='application/json')
+    if single:
+        return jsonify(columns_to_json(next(iter(columns_by_pair.values()))))
+    return jsonify({pair: columns_to_json(columns) for pair, columns in columns_by_pair.items()})
+
+def download_history(instrument_ids, interval, start=None, end=None, period=None):
+    """Downloads OHLCV bars for one or more instruments and returns a frame per instrument id."""
+    ids_by_ticker = {get_instrument(instrument_id).provider_ticker: instrument_id for instrument_id in instrument_ids}
+    if start and end:
+        frames = download_chunked(fetch_scheduler.download, list(ids_by_ticker), interval, start, end, chunk_executor)
+    else:
+        frames = fetch_scheduler.download(list(ids_by_ticker), interval, start=start, end=end, period=period)
+    return {ids_by_ticker[ticker]: frame for ticker, frame in frames.items()}
+
+def get_history(tickers, interval, start=None, end=None, period=None):
+    """Returns OHLCV frames per ticker, serving from the history cache where possible.
+
+    Only the tickers missing from the cache are downloaded, in a single request
+    that concurrent callers asking for the same tickers and range share.
+    """
+    if not (start and end):
+        start = end = None
+
+    frames, missing = get_cached_history(tickers, interval, start, end, period)
+    if missing:
+        frames.update(fetch_history(missing, interval, start, end, period))
+    return frames
+
+def get_cached_history(tickers, interval, start, end, period):
+    """Splits tickers into frames already in the history cache and tickers still missing."""
+    frames = {}
+    missing = []
+    for ticker in tickers:
+        frame = history_cache.get((ticker, interval, start, end, period))
+        if frame is None:
+            if ticker not in missing:
+                missing.append(ticker)
+        else:
+            frames[ticker] = frame
+    return frames, missing
+
+def fetch_history(tickers, interval, start, end, period):
+    """Fetches tickers in one call, shared with concurrent callers asking for the same key."""
+    flight_key = (tuple(sorted(tickers)), interval, start, end, period)
+    return history_flight.do(
+        flight_key,
+        lambda: load_history(tickers, interval, start, end, period)
+    )
+
+def load_history(tickers, interval, start, end, period):
+    """Fetches history for tickers from the store or provider and fills the history cache.
+
+    Triangulated crosses are built from their legs, which are fetched
+    alongside the other tickers and cached like any directly requested pair.
+    """
+    crosses, direct = triangulator.split(tickers)
+    if start is None and period in PERIOD_LENGTHS:
+        fetched = fetch_with_store(direct, interval, period)
+    else:
+        fetched = download_history(direct, interval, start=start, end=end, period=period)
+    for cross, (base_leg, quote_leg) in crosses.items():
+        fetched[cross] = triangulator.frame(base_leg, fetched.get(base_leg), quote_leg, fetched.get(quote_leg))
+
+    for ticker, frame in fetched.items():
+        if not frame.empty:
+            history_cache.set((ticker, interval, start, end, period), frame, history_ttl(ticker, interval))
+    return {ticker: fetched[ticker] for ticker in tickers if ticker in fetched}
+
+def fetch_with_store(tickers, interval, period):
+    """Brings the bar store up to date for tickers and returns the requested window.
+
+    Tickers whose stored bars reach into the window only download the tail since
+    their last stored bar; the rest download the whole period.
+    """
+    window_start = pd.Timestamp.now(tz='UTC') - PERIOD_LENGTHS[period]
+    full = []
+    tails = {}
+    for ticker in tickers:
+        last_timestamp = bar_store.last_timestamp(ticker, interval)
+        if last_timestamp is None or last_timestamp < window_start:
+            full.append(ticker)
+        else:
+            tails[ticker] = last_timestamp
+
+    fetched = {}
+    if full:
+        fetched.update(download_history(full, interval, period=period))
+    if tails:
+        # Start at the oldest last bar so the still-forming candle is re-fetched and revised
+        fetched.update(download_history(list(tails), interval, start=min(tails.values())))
+    for ticker, frame in fetched.items():
+        bar_store.write(ticker, interval, frame)
+
+    return {ticker: bar_store.read(ticker, interval, start=window_start) for ticker in tickers}
+
+def get_default_period(interval):
+    """Returns the lookback period used when no date range is requested."""
+    return '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
+
+def route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def stage(name):
+    """Times a stage of the current request: fetch, transform, serialize or compress."""
+    return stage_seconds.time(route=route_label(), stage=name)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+# Registered before compress_response so that it runs after it and includes compression time
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        request_seconds.observe(
+            time.perf_counter() - started, route=route_label(), method=request.method, status=response.status_code
+        )
+    return response
+
+@app.after_request
+def vary_on_accept(response):
+    """Marks responses whose format was negotiated from the Accept header."""
+    if g.get('negotiated_format'):
+        response.vary.add('Accept')
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compresses large or streamed responses with the best encoding the client accepts."""
+    if (response.status_code != 200 or request.method == 'HEAD'
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        with stage('compress'):
+            key = (body_digest(body), encoding)
+            compressed = compressed_cache.get(key)
+            if compressed is None:
+                compressed = compress(body, encoding)
+                compressed_cache.set(key, compressed, COMPRESSED_CACHE_TTL_SECONDS)
+            response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    # The encoded bytes differ from the identity ones, so the validator can only stay as a weak one
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
 @app.route('/api/forex-data')
 def get_forex_data():
     pair = request.args.get('pair')
@@ -66,61 +437,60 @@ def get_forex_data():
     if not pair:
         return jsonify({'error': 'The "pair" parameter is required.'}), 400
 
-    formatted_pair = format_symbol_for_yfinance(pair)
-    interval = get_yfinance_interval(timeframe)
-    
-    # Construct parameters for yfinance
-    params = {'interval': interval}
-    if start_date and end_date:
-        params['start'] = start_date
-        params['end'] = end_date
-    else:
-        # Default period if no date range is provided
-        params['period'] = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
+    response_format = get_response_format()
+    format_error = check_response_format(response_format, SINGLE_RESPONSE_FORMATS)
+    if format_error:
+        return format_error
 
+    instrument_id = resolve_symbol(pair).id
+    interval, bucket = resolve_timeframe(timeframe)
     try:
-        # Use yf.download for more robust fetching
-        data = yf.download(
-            tickers=formatted_pair,
-            **params,
-            auto_adjust=False,
-            progress=False
-        )
+        session_offset = get_session_offset()
+    except ValueError:
+        return jsonify({'error': 'Invalid "session_offset" parameter.'}), 400
+    try:
+        since = get_since()
+    except ValueError:
+        return jsonify({'error': 'Invalid "since" parameter.'}), 400
+
+    period = None if start_date and end_date else get_default_period(interval)
+    range_clamped = False
+    if period is None:
+        try:
+            start_date, range_clamped = clamp_start(interval, start_date, end_date)
+        except ValueError:
+            return jsonify({'error': 'Invalid "start_date" or "end_date" parameter.'}), 400
+        if start_date is None:
+            days = PROVIDER_LOOKBACKS[interval].days
+            return jsonify({'error': f'{timeframe} data is only available for the last {days} days.'}), 400
 
-        if data.empty:
+    try:
+        with stage('fetch'):
+            data = get_history([instrument_id], interval, start=start_date, end=end_date, period=period).get(instrument_id)
+
+        if data is None or data.empty:
             return jsonify({'error': f'No data found for {pair} with the specified parameters.'}), 404
 
-        data.reset_index(inplace=True)
-        
-        # Identify the correct timestamp column
-        timestamp_col = 'Datetime' if 'Datetime' in data.columns else 'Date'
-        
-        # Standardize timestamp to UTC
-        if data[timestamp_col].dt.tz:
-            data[timestamp_col] = data[timestamp_col].dt.tz_convert('UTC')
-        else:
-            data[timestamp_col] = data[timestamp_col].dt.tz_localize('UTC')
-        
-        data['time'] = data[timestamp_col].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        # Rename columns to be frontend-friendly
-        data.rename(columns={
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        }, inplace=True)
-
-        # Ensure all required columns are present
-        required_cols = ['time', 'open', 'high', 'low', 'close']
-        if 'volume' in data.columns:
-            required_cols.append('volume')
-        
-        # Replace NaN with None for JSON compatibility
-        data.replace({np.nan: None}, inplace=True)
-        
-        return jsonify(data[required_cols].to_dict(orient='records'))
+        with stage('transform'):
+            if bucket is not None:
+                data = resample_bars(data, bucket, session_offset)
+
+            columns = frame_columns(data)
+            if since is not None:
+                # Polling clients pass their last bar time and get it back revised, plus any newer bars
+                columns = slice_columns(columns, since)
+
+        with stage('serialize'):
+            etag = columns_etag(columns, response_format)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = columns_response({pair: columns}, response_format, single=True)
+            response.set_etag(etag)
+        if range_clamped:
+            # The provider has nothing older; tell the client where its data really starts
+            response.headers['X-Range-Start'] = start_date
+        return response
 
     except Exception as e:
         print(f"Error fetching data for {pair}: {str(e)}")
@@ -134,161 +504,563 @@ def get_bulk_forex_data():
     if not pairs:
         return jsonify({'error': 'The "pairs" parameter is required.'}), 400
 
-    pairs_list = pairs.split(',')
-    formatted_pairs_list = [format_symbol_for_yfinance(p) for p in pairs_list]
-    interval = get_yfinance_interval(timeframe)
-    period = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
+    response_format = get_response_format()
+    format_error = check_response_format(response_format)
+    if format_error:
+        return format_error
 
+    pairs_list = pairs.split(',')
+    instrument_ids = [resolve_symbol(p).id for p in pairs_list]
+    interval, bucket = resolve_timeframe(timeframe)
+    period = get_default_period(interval)
     try:
-        data = yf.download(
-            tickers=formatted_pairs_list,
-            period=period,
-            interval=interval,
-            group_by='ticker',
-            auto_adjust=False,
-            threads=True,
-            progress=False
+        session_offset = get_session_offset()
+    except ValueError:
+        return jsonify({'error': 'Invalid "session_offset" parameter.'}), 400
+
+    if response_format == 'ndjson':
+        return Response(
+            stream_with_context(stream_bulk_history(pairs_list, instrument_ids, interval, period, bucket, session_offset)),
+            mimetype=NDJSON_MIMETYPE
         )
 
-        results = {}
-        for i, pair in enumerate(pairs_list):
-            formatted_pair = formatted_pairs_list[i]
-            
-            if formatted_pair in data.columns:
-                pair_data = data[formatted_pair].copy()
-                pair_data.reset_index(inplace=True)
-                
-                timestamp_col = 'Datetime' if 'Datetime' in pair_data.columns else 'Date'
-                
-                if pair_data[timestamp_col].dt.tz:
-                    pair_data[timestamp_col] = pair_data[timestamp_col].dt.tz_convert('UTC')
+    try:
+        with stage('fetch'):
+            data = get_history(instrument_ids, interval, period=period)
+
+        with stage('transform'):
+            columns_by_pair = {}
+            for pair, instrument_id in zip(pairs_list, instrument_ids):
+                if instrument_id not in data:
+                    columns_by_pair[pair] = empty_columns()
+                elif bucket is not None:
+                    columns_by_pair[pair] = frame_columns(resample_bars(data[instrument_id], bucket, session_offset))
                 else:
-                    pair_data[timestamp_col] = pair_data[timestamp_col].dt.tz_localize('UTC')
-                
-                pair_data['time'] = pair_data[timestamp_col].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-                pair_data.rename(columns={
-                    'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-                }, inplace=True)
-                
-                required_cols = ['time', 'open', 'high', 'low', 'close']
-                if 'volume' in pair_data.columns:
-                    required_cols.append('volume')
-                
-                # Replace NaN with None for JSON compatibility
-                pair_data.replace({np.nan: None}, inplace=True)
-                results[pair] = pair_data[required_cols].to_dict(orient='records')
-            else:
-                results[pair] = []
+                    columns_by_pair[pair] = frame_columns(data[instrument_id])
 
-        return jsonify(results)
+        with stage('serialize'):
+            return columns_response(columns_by_pair, response_format)
 
     except Exception as e:
         print(f"Error fetching bulk historical data: {str(e)}")
         return jsonify({'error': 'An error occurred while fetching bulk historical data.'}), 500
 
+def stream_bulk_history(pairs_list, instrument_ids, interval, period, bucket, session_offset):
+    """Yields one NDJSON line per pair as soon as its bars are available.
+
+    Pairs already in the history cache are written first; the rest follow
+    after a single shared fetch. Only one pair is encoded at a time.
+    """
+    def pair_columns(frame):
+        if bucket is not None:
+            frame = resample_bars(frame, bucket, session_offset)
+        return frame_columns(frame)
+
+    frames, missing = get_cached_history(instrument_ids, interval, None, None, period)
+    pending = []
+    for pair, instrument_id in zip(pairs_list, instrument_ids):
+        if instrument_id in frames:
+            yield pair_ndjson_line(pair, pair_columns(frames[instrument_id]))
+        else:
+            pending.append((pair, instrument_id))
+    if not pending:
+        return
+
+    try:
+        frames = fetch_history(missing, interval, None, None, period)
+    except Exception as e:
+        print(f"Error fetching bulk historical data: {str(e)}")
+        for pair, _ in pending:
+            yield pair_ndjson_line(pair, error='An error occurred while fetching historical data.')
+        return
+
+    for pair, instrument_id in pending:
+        if instrument_id in frames:
+            yield pair_ndjson_line(pair, pair_columns(frames[instrument_id]))
+        else:
+            yield pair_ndjson_line(pair, empty_columns())
+
+def get_indicator_series(key, indicators):
+    """Returns the shared IndicatorSeries for key, creating it on first use."""
+    with indicator_lock:
+        series = indicator_cache.get(key)
+        if series is None:
+            series = IndicatorSeries(indicators)
+            indicator_cache.set(key, series, INDICATOR_TTL_SECONDS)
+    return series
+
+@app.route('/api/indicators')
+def get_indicators():
+    """SMA/EMA/RSI/ATR/Bollinger values for a pair, as parallel arrays aligned with the bar times.
+
+    Values are computed once per pair and timeframe and shared by every client;
+    new bars only extend the stored series instead of recomputing it.
+    """
+    pair = request.args.get('pair')
+    timeframe = request.args.get('timeframe', '1h')
+
+    if not pair:
+        return jsonify({'error': 'The "pair" parameter is required.'}), 400
+
+    try:
+        indicators = parse_indicators(request.args.get('indicators', DEFAULT_INDICATORS))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    instrument_id = resolve_symbol(pair).id
+    interval, bucket = resolve_timeframe(timeframe)
+    try:
+        session_offset = get_session_offset()
+    except ValueError:
+        return jsonify({'error': 'Invalid "session_offset" parameter.'}), 400
+    try:
+        since = get_since()
+    except ValueError:
+        return jsonify({'error': 'Invalid "since" parameter.'}), 400
+
+    period = get_default_period(interval)
+
+    def bar_columns(frame):
+        if bucket is not None:
+            frame = resample_bars(frame, bucket, session_offset)
+        return frame_columns(frame)
+
+    try:
+        with stage('fetch'):
+            data = get_history([instrument_id], interval, period=period).get(instrument_id)
+
+        if data is None or data.empty:
+            return jsonify({'error': f'No data found for {pair} with the specified parameters.'}), 404
+
+        with stage('transform'):
+            key = (instrument_id, interval, bucket, session_offset, indicators)
+            series = get_indicator_series(key, indicators)
+            columns = series.update(data, bar_columns)
+            # Store again so the cache accounts for the grown series and keeps it while in use
+            indicator_cache.set(key, series, INDICATOR_TTL_SECONDS)
+
+            if since is not None:
+                columns = slice_columns(columns, since)
+
+        with stage('serialize'):
+            etag = columns_etag(columns, indicators)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = jsonify(columns_to_json(columns))
+            response.set_etag(etag)
+        return response
+
+    except Exception as e:
+        print(f"Error computing indicators for {pair}: {str(e)}")
+        return jsonify({'error': f'An error occurred while computing indicators for {pair}.'}), 500
+
+def bar_age(timestamp):
+    """Seconds since the bar at timestamp closed; naive timestamps are taken as UTC."""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tz is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return (pd.Timestamp.now(tz='UTC') - timestamp).total_seconds() - 60
+
+def get_last_price(instrument_id):
+    """Returns (price, source) for an instrument from memory, or (None, None) if nothing fresh is held.
+
+    Tries the bulk price snapshot, then a recent provider quote, then the newest cached 1m bar.
+    While the market is open a bar older than PRICE_MAX_STALENESS_SECONDS is not used.
+    """
+    entry = price_refresher.snapshot.get(instrument_id)
+    if entry is not None and 'price' in entry and price_entry_age(entry) <= PRICE_MAX_STALENESS_SECONDS:
+        return entry['price'], 'snapshot'
+
+    price = quote_cache.get(instrument_id)
+    if price is not None:
+        return price, 'quote'
+
+    frame = history_cache.get((instrument_id, '1m', None, None, get_default_period('1m')))
+    if frame is not None:
+        closes = frame['Close'].dropna()
+        if not closes.empty and not (
+            market_calendar.is_open(get_instrument(instrument_id).asset_class)
+            and bar_age(closes.index[-1]) > PRICE_MAX_STALENESS_SECONDS
+        ):
+            return closes.iloc[-1], 'bars'
+    return None, None
+
 @app.route('/api/forex-price')
 def get_forex_price():
     pair = request.args.get('pair')
     if not pair:
         return jsonify({'error': 'Pair parameter is missing.'}), 400
 
-    formatted_pair = format_symbol_for_yfinance(pair)
+    instrument = resolve_symbol(pair)
+    # Later lookups of this pair can then be answered from the snapshot
+    record_price_demand([instrument.id])
+    price_refresher.start()
 
-    try:
-        ticker = yf.Ticker(formatted_pair)
-        if not ticker.info:
-            return jsonify({'error': f'Invalid ticker symbol: {pair}'}), 404
-        info = ticker.info
+    price, source = get_last_price(instrument.id)
+    if price is not None:
+        response = jsonify({'pair': pair, 'price': price})
+        response.headers['X-Price-Source'] = source
+        return response
 
-        # yfinance provides different fields for price, try to find one that exists
-        price = info.get('regularMarketPrice') or info.get('bid') or info.get('ask')
-
-        if price:
-            return jsonify({'pair': pair, 'price': price})
+    try:
+        legs = triangulator.legs(instrument.id)
+        if legs is None:
+            price, source = fetch_last_price(instrument.provider_ticker)
         else:
-            # If no direct price field, try to get the last close price from a short period
-            data = ticker.history(period='1d', interval='1m')
-            if not data.empty:
-                latest_price = data['Close'].iloc[-1]
-                return jsonify({'pair': pair, 'price': latest_price})
-            else:
-                return jsonify({'error': f'No price data found for {pair}'}), 404
+            leg_prices = {leg: get_last_price(leg)[0] or fetch_last_price(get_instrument(leg).provider_ticker)[0] for leg in legs}
+            price = triangulator.prices({instrument.id: legs}, leg_prices).get(instrument.id)
+            source = 'triangulated'
+        if price is None:
+            return jsonify({'error': f'No price data found for {pair}'}), 404
+
+        quote_cache.set(instrument.id, price, market_calendar.ttl(instrument.asset_class, QUOTE_TTL_SECONDS))
+        response = jsonify({'pair': pair, 'price': price})
+        response.headers['X-Price-Source'] = source
+        return response
 
     except Exception as e:
         print(f"Error fetching data for {pair}: {str(e)}")
         return jsonify({'error': f'An error occurred while fetching data for {pair}.'}), 500
 
+def fetch_last_price(ticker):
+    """Asks the provider for a ticker's price; returns (price, source), with price None if there is none."""
+    price = provider.last_price(ticker)
+    if price:
+        return price, 'provider'
+    # If there is no quote, fall back to the last close of a short 1m history
+    data = fetch_scheduler.download([ticker], '1m', period='1d', auto_adjust=True).get(ticker)
+    closes = data['Close'].dropna() if data is not None else None
+    if closes is None or closes.empty:
+        return None, None
+    return closes.iloc[-1], 'bars'
+
+def fetch_bulk_prices():
+    """Downloads the latest 1m close for the universe symbols that are due and merges them into the snapshot."""
+    if shared_store is not None:
+        # Only the leader refreshes, so it has to see what clients asked the other workers for
+        for _, requested in shared_store.items('price-demand:'):
+            symbol_universe.merge(requested)
+    members = symbol_universe.members()
+    snapshot = {pair: entry for pair, entry in price_refresher.snapshot.items() if pair in members}
+    # Closed markets keep their last price; they are only fetched if we have none yet
+    due = [
+        symbol for symbol in symbol_universe.due()
+        if market_calendar.is_open(get_instrument(symbol).asset_class) or 'price' not in snapshot.get(symbol, {})
+    ]
+    if not due:
+        return snapshot
+
+    # Crosses are priced from the legs in this same download, so they agree with each other
+    crosses, direct = triangulator.split(due)
+    instruments = [get_instrument(symbol) for symbol in direct]
+    data = fetch_scheduler.download([instrument.provider_ticker for instrument in instruments], '1m', period='1d', auto_adjust=True)
+
+    refreshed_at = round(time.time(), 3)
+    entries = {}
+    for instrument in instruments:
+        pair = instrument.id
+        frame = data.get(instrument.provider_ticker)
+        
+        if frame is not None and not frame.empty:
+            closes = frame['Close'].dropna()
+            last_price = closes.iloc[-1] if not closes.empty else None
+            if last_price is not None and pd.notna(last_price):
+                entry = {'pair': pair, 'price': last_price, 'refreshed_at': refreshed_at}
+            else:
+                entry = {'error': f'No recent price data for {pair}'}
+        else:
+            entry = {'error': f'No data found for {pair}'}
+        entries[pair] = entry
+    leg_prices = {pair: entry.get('price') for pair, entry in entries.items()}
+    cross_prices = triangulator.prices(crosses, leg_prices)
+    for cross in crosses:
+        if cross in cross_prices:
+            entries[cross] = {'pair': cross, 'price': cross_prices[cross], 'refreshed_at': refreshed_at}
+        else:
+            entries[cross] = {'error': f'No recent price data for the legs of {cross}'}
+
+    for pair in due:
+        entry = entries[pair]
+        # A failed download does not replace a price we already have
+        if 'price' in entry or 'price' not in snapshot.get(pair, {}):
+            snapshot[pair] = entry
+    symbol_universe.mark_refreshed(due)
+
+    # Keep the previous snapshot rather than replacing it with nothing but errors
+    if not any('price' in entry for entry in snapshot.values()):
+        raise ValueError('Bulk price download returned no prices.')
+    return snapshot
+
+def price_entry_age(entry, now=None):
+    """Seconds since a snapshot entry's price was fetched; entries refresh on their own tier's schedule."""
+    refreshed_at = entry.get('refreshed_at', price_refresher.snapshot_time)
+    return (now or time.time()) - refreshed_at
+
+def price_entries_age(entries):
+    """The age of the oldest price among entries, or of the whole snapshot if none has a price."""
+    now = time.time()
+    ages = [price_entry_age(entry, now) for entry in entries if 'price' in entry]
+    return max(ages) if ages else price_refresher.age() or 0
+
+# How often a worker publishes its price demand for the refreshing worker
+PRICE_DEMAND_PUBLISH_SECONDS = 5
+price_demand_published = 0
+
+def record_price_demand(instrument_ids):
+    """Counts client interest in instruments; ones that just became hot are fetched on an early refresh."""
+    global price_demand_published
+    promoted = symbol_universe.record(instrument_ids)
+    if shared_store is not None and (promoted or time.time() - price_demand_published >= PRICE_DEMAND_PUBLISH_SECONDS):
+        price_demand_published = time.time()
+        shared_store.set(
+            f'price-demand:{WORKER_ID}',
+            symbol_universe.requested_since(price_demand_published - PRICE_UNIVERSE_DROP_SECONDS),
+            PRICE_UNIVERSE_DROP_SECONDS
+        )
+    if promoted:
+        price_refresher.wake()
+
+price_refresher = PriceRefresher(
+    fetch_bulk_prices, PRICE_REFRESH_SECONDS, PRICE_MAX_STALENESS_SECONDS, shared=shared_store, owner=WORKER_ID
+)
+price_broadcaster = PriceBroadcaster()
+price_refresher.add_listener(price_broadcaster.publish)
+
 @app.route('/api/bulk-forex-price')
 def get_bulk_forex_price():
-    global cache, cache_timestamp
-    current_time = time.time()
-
-    # Check if cache is valid
-    if current_time - cache_timestamp < CACHE_DURATION_SECONDS and cache:
-        pairs = request.args.get('pairs')
-        if not pairs:
-            return jsonify(cache)
+    pairs = request.args.get('pairs')
+    if pairs:
         pairs_list = pairs.split(',')
-        # Return only the requested pairs from the cache
-        cached_results = {pair: cache.get(pair) for pair in pairs_list if pair in cache}
-        return jsonify(cached_results)
-
-    # If cache is invalid, fetch new data for all known symbols
-    all_known_symbols = [
-      'XAU/USD', 'XAG/USD', 'EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD',
-      'EUR/JPY', 'GBP/JPY', 'CHF/JPY', 'AUD/JPY', 'CAD/JPY', 'NZD/JPY', 'EUR/GBP',
-      'EUR/CHF', 'EUR/AUD', 'EUR/CAD', 'EUR/NZD', 'GBP/AUD', 'GBP/CAD', 'GBP/NZD',
-      'AUD/CHF', 'AUD/CAD', 'AUD/NZD', 'CAD/CHF', 'NZD/CHF', 'NZD/CAD'
-    ]
-    formatted_pairs_list = [format_symbol_for_yfinance(p) for p in all_known_symbols]
-    
-    try:
-        data = yf.download(
-            tickers=formatted_pairs_list,
-            period='1d',
-            interval='1m',
-            group_by='ticker',
-            auto_adjust=True,
-            threads=True,
-            progress=False
-        )
+        instrument_ids = [resolve_symbol(pair).id for pair in pairs_list]
+        # Before reading the snapshot, so an inline refresh already includes newly requested pairs
+        record_price_demand(instrument_ids)
+
+    snapshot, _ = price_refresher.get()
+    if not snapshot:
+        return jsonify({'error': 'An error occurred while fetching bulk data and cache is empty.'}), 500
+
+    if pairs:
+        # Return only the requested pairs from the snapshot, under the names the client used
+        requested = {}
+        for pair, instrument_id in zip(pairs_list, instrument_ids):
+            entry = snapshot.get(instrument_id)
+            if entry is not None:
+                requested[pair] = entry
+        snapshot = requested
+
+    # Age and staleness describe the prices actually served, which refresh on their own schedules
+    age = price_entries_age(snapshot.values())
+    response = jsonify(snapshot)
+    response.headers['Age'] = str(int(age))
+    response.headers['X-Snapshot-Age'] = f'{age:.3f}'
+    if age > PRICE_MAX_STALENESS_SECONDS:
+        response.headers['Warning'] = '110 - "Response is Stale"'
+    return response
+
+@app.route('/api/price-stream')
+def stream_prices():
+    """Server-sent events: one 'snapshot' of the requested pairs, then 'update' events with changed prices only.
+
+    Events are keyed by canonical instrument id, e.g. 'EUR/USD' for a subscription to 'EURUSD'.
+    """
+    pairs = request.args.get('pairs')
+    pairs_list = [resolve_symbol(pair).id for pair in pairs.split(',')] if pairs else []
+
+    # Subscribe before reading the snapshot so no change can slip in between, and drop
+    # whatever queued up until then since the snapshot read afterwards already has it
+    subscription = price_broadcaster.subscribe(pairs_list)
+    record_price_demand(pairs_list)
+    price_refresher.get()
+    subscription.wait(0)
+    snapshot = price_refresher.snapshot
+    if pairs_list:
+        snapshot = {pair: snapshot[pair] for pair in pairs_list if pair in snapshot}
 
-        new_cache_data = {}
-        for i, pair in enumerate(all_known_symbols):
-            formatted_pair = formatted_pairs_list[i]
-            
-            if formatted_pair in data.columns and not data[formatted_pair].empty:
-                last_price = data[formatted_pair]['Close'].dropna().iloc[-1] if not data[formatted_pair]['Close'].dropna().empty else None
-                if last_price is not None and pd.notna(last_price):
-                    new_cache_data[pair] = {'pair': pair, 'price': last_price}
+    def generate():
+        try:
+            yield sse_event('snapshot', snapshot)
+            while True:
+                changes = subscription.wait(STREAM_HEARTBEAT_SECONDS)
+                # Pairs stay hot for as long as someone is streaming them
+                record_price_demand(pairs_list)
+                if changes:
+                    yield sse_event('update', changes)
                 else:
-                    new_cache_data[pair] = {'error': f'No recent price data for {pair}'}
-            else:
-                 new_cache_data[pair] = {'error': f'No data found for {pair}'}
-        
-        # Update cache
-        cache = new_cache_data
-        cache_timestamp = current_time
-        
-        # Return requested pairs from the newly fetched data
-        requested_pairs = request.args.get('pairs')
-        if not requested_pairs:
-            return jsonify(cache)
-        
-        requested_pairs_list = requested_pairs.split(',')
-        requested_results = {pair: cache.get(pair) for pair in requested_pairs_list if pair in cache}
-        return jsonify(requested_results)
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': heartbeat\n\n'
+        finally:
+            price_broadcaster.unsubscribe(subscription)
 
-    except Exception as e:
-        print(f"Error fetching bulk data: {str(e)}")
-        # Return stale cache data if available, otherwise error
-        if cache:
-            return jsonify(cache)
-        return jsonify({'error': 'An error occurred while fetching bulk data and cache is empty.'}), 500
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
-import os
+# Hot caches are saved to disk and reloaded on start, so a deploy or crash does not start cold
+CACHE_SNAPSHOT_PATH = os.environ.get(
+    'FOREX_CACHE_SNAPSHOT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache_snapshot.pickle')
+)
+CACHE_SNAPSHOT_SECONDS = int(os.environ.get('FOREX_CACHE_SNAPSHOT_SECONDS', 300))
+# Reloaded entries are served for at least this long while the prefetch replaces them
+CACHE_SNAPSHOT_STALE_SECONDS = int(os.environ.get('FOREX_CACHE_SNAPSHOT_STALE_SECONDS', 120))
+CACHE_SNAPSHOT_MAX_AGE_SECONDS = int(os.environ.get('FOREX_CACHE_SNAPSHOT_MAX_AGE_SECONDS', 24 * 3600))
+cache_snapshotter = CacheSnapshotter(
+    CACHE_SNAPSHOT_PATH, {'history': history_cache}, price_refresher,
+    CACHE_SNAPSHOT_SECONDS, CACHE_SNAPSHOT_STALE_SECONDS, CACHE_SNAPSHOT_MAX_AGE_SECONDS
+) if CACHE_SNAPSHOT_PATH else None
+
+# Pairs and timeframes fetched fresh on start, before the service takes traffic
+PREFETCH_PAIRS = [pair for pair in os.environ.get('FOREX_PREFETCH_PAIRS', 'EUR/USD,GBP/USD,USD/JPY,AUD/USD,USD/CAD').split(',') if pair]
+PREFETCH_TIMEFRAMES = [timeframe for timeframe in os.environ.get('FOREX_PREFETCH_TIMEFRAMES', '1h,1d').split(',') if timeframe]
+PREFETCH_TIMEOUT_SECONDS = int(os.environ.get('FOREX_PREFETCH_TIMEOUT_SECONDS', 60))
+# Without a snapshot file or prefetch list there is nothing to wait for
+WARM_START_CONFIGURED = cache_snapshotter is not None or bool(PREFETCH_PAIRS and PREFETCH_TIMEFRAMES)
+warm_ready = threading.Event()
+warm_start_lock = threading.Lock()
+warm_started = False
+if cache_snapshotter is not None:
+    # Imported on the main thread in every serving mode; chains to the server's own handler
+    cache_snapshotter.save_on_sigterm()
+
+def prefetch():
+    """Refreshes the price snapshot and the default history windows of the prefetch list."""
+    price_refresher.refresh()
+    instrument_ids = [resolve_symbol(pair).id for pair in PREFETCH_PAIRS]
+    for timeframe in PREFETCH_TIMEFRAMES:
+        interval, _ = resolve_timeframe(timeframe)
+        try:
+            # Bypasses the cache so reloaded entries are replaced, not just found
+            fetch_history(instrument_ids, interval, None, None, get_default_period(interval))
+        except Exception as e:
+            print(f"Error prefetching {timeframe} history: {str(e)}")
+
+def warm_start():
+    """Reloads the saved caches and runs the prefetch; returns when it is done or has timed out.
+
+    Runs once per process: whichever of the server entry points, the ASGI
+    lifespan or the first request gets here first does the work.
+    """
+    global warm_started
+    with warm_start_lock:
+        if warm_started:
+            return
+        warm_started = True
+    try:
+        if cache_snapshotter is not None:
+            restored = cache_snapshotter.load()
+            print(f"Restored {restored} cache entries from {CACHE_SNAPSHOT_PATH}")
+            cache_snapshotter.start()
+        if PREFETCH_PAIRS:
+            worker = threading.Thread(target=prefetch, name='prefetch', daemon=True)
+            worker.start()
+            # A slow provider delays the start but never blocks it; the reloaded entries cover the gap
+            worker.join(PREFETCH_TIMEOUT_SECONDS)
+    finally:
+        warm_ready.set()
+        price_refresher.start()
+
+@app.before_request
+def start_warm_up():
+    # WSGI servers such as gunicorn have no startup hook; their first request, usually the
+    # readiness probe, starts the warm-up in the background
+    if not warm_started:
+        threading.Thread(target=warm_start, name='warm-start', daemon=True).start()
+
+@app.route('/api/ready')
+def get_ready():
+    if WARM_START_CONFIGURED and not warm_ready.is_set():
+        return jsonify({'ready': False}), 503
+    return jsonify({'ready': True})
+
+@app.route('/api/cache-stats')
+def get_cache_stats():
+    return jsonify({
+        'history': history_cache.stats(),
+        'history_fetches': history_flight.stats(),
+        'provider': provider.stats(),
+        'fetch_batches': fetch_scheduler.stats(),
+        'compressed': compressed_cache.stats(),
+        'quotes': quote_cache.stats(),
+        'indicators': indicator_cache.stats(),
+        'bulk_price': price_refresher.stats(),
+        'price_stream': price_broadcaster.stats(),
+        'price_universe': symbol_universe.stats(),
+        'triangulation': triangulator.stats(),
+        'market_hours': market_calendar.stats(),
+        'shared': shared_store.stats() if shared_store is not None else None,
+        'warm_start': cache_snapshotter.stats() if cache_snapshotter is not None else None,
+    })
+
+cache_entries = metrics.gauge('forex_cache_entries', 'Entries held per cache.', ['cache'])
+cache_bytes = metrics.gauge('forex_cache_bytes', 'Estimated bytes held per cache.', ['cache'])
+cache_max_bytes = metrics.gauge('forex_cache_max_bytes', 'Byte budget per cache.', ['cache'])
+cache_hit_ratio = metrics.gauge('forex_cache_hit_ratio', 'Hits over lookups since start, per cache.', ['cache'])
+cache_lookups = metrics.counter('forex_cache_lookups', 'Cache lookups per cache and result.', ['cache', 'result'])
+cache_evictions = metrics.counter('forex_cache_evictions', 'Entries evicted to stay within the byte budget.', ['cache'])
+price_snapshot_age = metrics.gauge('forex_price_snapshot_age_seconds', 'Age of the bulk price snapshot.')
+price_refresh_lag = metrics.gauge(
+    'forex_price_refresh_lag_seconds', 'How far the price refresher is behind its schedule (snapshot age past the interval).'
+)
+price_refresh_duration = metrics.gauge('forex_price_refresh_duration_seconds', 'Duration of the last successful price refresh.')
+price_refreshes = metrics.counter('forex_price_refreshes', 'Price refreshes by result.', ['result'])
+provider_in_flight = metrics.gauge('forex_provider_in_flight', 'Provider calls currently running.')
+provider_waiting = metrics.gauge('forex_provider_waiting', 'Callers waiting for a provider slot.')
+fetch_requests = metrics.counter('forex_fetch_requests', 'Downloads requested from the fetch scheduler.')
+fetch_batches = metrics.counter('forex_fetch_batches', 'Provider downloads issued by the fetch scheduler.')
+fetch_retries = metrics.counter('forex_fetch_retries', 'Downloads retried after the provider throttled them.')
+history_coalesced = metrics.counter('forex_history_fetches_coalesced', 'History fetches that joined one already in flight.')
+universe_symbols = metrics.gauge('forex_price_universe_symbols', 'Symbols in the price universe per demand tier.', ['tier'])
+stream_subscribers = metrics.gauge('forex_price_stream_subscribers', 'Connected price stream clients.')
+
+def collect_metrics():
+    """Copies cache, refresher and scheduler state into the metrics before each scrape."""
+    caches = {
+        'history': history_cache,
+        'compressed': compressed_cache,
+        'indicators': indicator_cache,
+        'quotes': quote_cache,
+    }
+    for name, cache in caches.items():
+        stats = cache.stats()
+        cache_entries.set(stats['entries'], cache=name)
+        cache_bytes.set(stats['bytes'], cache=name)
+        cache_max_bytes.set(stats['max_bytes'], cache=name)
+        cache_hit_ratio.set(stats['hit_ratio'], cache=name)
+        cache_lookups.set(stats['hits'], cache=name, result='hit')
+        cache_lookups.set(stats['misses'], cache=name, result='miss')
+        cache_evictions.set(stats['evictions'], cache=name)
+
+    refresher_stats = price_refresher.stats()
+    age = price_refresher.age()
+    price_snapshot_age.set(age)
+    price_refresh_lag.set(max(0.0, age - PRICE_REFRESH_SECONDS) if age is not None else None)
+    price_refresh_duration.set(refresher_stats['last_duration_seconds'])
+    price_refreshes.set(refresher_stats['refreshes'], result='success')
+    price_refreshes.set(refresher_stats['errors'], result='error')
+
+    provider_stats = provider.stats()
+    provider_in_flight.set(provider_stats['in_flight'])
+    provider_waiting.set(provider_stats['waiting'])
+    scheduler_stats = fetch_scheduler.stats()
+    fetch_requests.set(scheduler_stats['requests'])
+    fetch_batches.set(scheduler_stats['batches'])
+    fetch_retries.set(scheduler_stats['retries'])
+    history_coalesced.set(history_flight.stats()['coalesced'])
+    stream_subscribers.set(price_broadcaster.stats()['subscribers'])
+    for tier, count in symbol_universe.stats()['tiers'].items():
+        universe_symbols.set(count, tier=tier)
+
+metrics.add_collector(collect_metrics)
+
+@app.route('/metrics')
+def get_metrics():
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5009))
+    # With the debug reloader only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_start()
     app.run(port=port, debug=True)
@@ -0,0 +1,196 @@
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+
+# Every worker process gets its own owner id for leases
+WORKER_ID = f'{socket.gethostname()}-{os.getpid()}'
+
+# Expired rows are deleted on every this many writes
+PURGE_EVERY_WRITES = 500
+
+
+class SharedStore:
+    """Key-value store in a local SQLite file shared by every worker process on the host.
+
+    Values are pickled, so the file must only ever hold data this service
+    wrote itself. Besides entries with an expiry it hands out named leases,
+    which let one worker at a time do a job such as refreshing prices.
+    Storage errors are logged and treated as misses; the caller then falls
+    back to doing the work itself.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)')
+
+    def _connection(self):
+        # One connection per thread, and a fresh one after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_entry(self, key):
+        """Returns (value, expires_at) for key, or None if it is missing or expired."""
+        try:
+            row = self._connection().execute(
+                'SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Error reading shared cache: {str(e)}")
+            return None
+        if row is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return pickle.loads(row[0]), row[1]
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time() + ttl)
+            )
+            self._count('writes')
+            if self.writes % PURGE_EVERY_WRITES == 0:
+                conn.execute('DELETE FROM entries WHERE expires_at <= ?', (time.time(),))
+            return True
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Error writing shared cache: {str(e)}")
+            return False
+
+    def items(self, prefix):
+        """Returns [(key, value)] for every live entry whose key starts with prefix."""
+        try:
+            rows = self._connection().execute(
+                'SELECT key, value FROM entries WHERE key >= ? AND key < ? AND expires_at > ?',
+                (prefix, prefix + '\uffff', time.time())
+            ).fetchall()
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Error reading shared cache: {str(e)}")
+            return []
+        return [(key, pickle.loads(value)) for key, value in rows]
+
+    def delete_prefix(self, prefix):
+        try:
+            self._connection().execute('DELETE FROM entries WHERE key >= ? AND key < ?', (prefix, prefix + '\uffff'))
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Error writing shared cache: {str(e)}")
+
+    def acquire_lease(self, name, owner, ttl):
+        """Takes or renews the lease called name for owner; False while another owner holds it."""
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.owner = excluded.owner OR leases.expires_at <= ?',
+                (name, owner, now + ttl, now)
+            )
+            row = conn.execute('SELECT owner FROM leases WHERE name = ?', (name,)).fetchone()
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Error acquiring shared lease {name}: {str(e)}")
+            return False
+        return row is not None and row[0] == owner
+
+    def release_lease(self, name, owner):
+        """Gives up the lease called name if owner still holds it."""
+        try:
+            self._connection().execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, owner))
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Error releasing shared lease {name}: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'writes': self.writes,
+                'errors': self.errors,
+            }
+
+
+class TieredCache:
+    """A per-process TTLCache in front of a SharedStore namespace.
+
+    Local misses are looked up in the shared store and copied into the local
+    cache for the rest of their lifetime; writes go to both. Has the same
+    get/set/clear/stats interface as TTLCache.
+    """
+
+    def __init__(self, local, store, namespace):
+        self.local = local
+        self.store = store
+        self.namespace = namespace
+
+    def _key(self, key):
+        return f'{self.namespace}:{key!r}'
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        entry = self.store.get_entry(self._key(key))
+        if entry is None:
+            return None
+        value, expires_at = entry
+        self.local.set(key, value, expires_at - time.time())
+        return value
+
+    def set(self, key, value, ttl):
+        stored = self.local.set(key, value, ttl)
+        self.store.set(self._key(key), value, ttl)
+        return stored
+
+    def delete(self, key):
+        self.local.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        self.store.delete_prefix(f'{self.namespace}:')
+
+    def items(self):
+        return self.local.items()
+
+    def __len__(self):
+        return len(self.local)
+
+    def stats(self):
+        return dict(self.local.stats(), shared=self.store.stats())
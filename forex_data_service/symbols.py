@@ -0,0 +1,97 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# id is the canonical instrument name used in every cache, store and fetch key;
+# provider_ticker is what yfinance expects.
+Instrument = namedtuple('Instrument', ['id', 'asset_class', 'provider_ticker'])
+
+CURRENCIES = ['USD', 'EUR', 'GBP', 'JPY', 'CHF', 'AUD', 'CAD', 'NZD']
+EXTRA_CURRENCIES = ['SEK', 'NOK', 'DKK', 'SGD', 'HKD', 'MXN', 'ZAR', 'TRY', 'CNH', 'CNY', 'PLN', 'HUF', 'CZK', 'INR']
+
+CRYPTO_ASSETS = [
+    'BTC', 'ETH', 'ADA', 'BNB', 'XRP', 'SOL', 'DOT', 'DOGE', 'AVAX', 'LINK', 'LTC', 'XLM', 'FIL', 'AAVE',
+]
+
+# Instruments that do not follow the forex/crypto ticker rules, with their aliases
+SPECIAL_INSTRUMENTS = [
+    (Instrument('XAU/USD', 'metal', 'GC=F'), ['XAUUSD', 'GOLD', 'GC=F']),
+    (Instrument('XAG/USD', 'metal', 'SI=F'), ['XAGUSD', 'SILVER', 'SI=F']),
+    (Instrument('USOIL', 'commodity', 'CL=F'), ['WTI', 'CL=F']),
+    (Instrument('US30', 'index', '^DJI'), ['DJI', '^DJI']),
+    (Instrument('SPX500', 'index', '^GSPC'), ['SPX', 'US500', '^GSPC']),
+    (Instrument('NAS100', 'index', '^IXIC'), ['^IXIC']),
+]
+
+
+def _forex_instrument(base, quote):
+    return Instrument(f'{base}/{quote}', 'forex', f'{base}{quote}=X')
+
+
+def _crypto_instrument(asset):
+    return Instrument(f'{asset}/USD', 'crypto', f'{asset}-USD')
+
+
+def _build_registry():
+    registry = {}
+
+    def add(instrument, aliases):
+        for alias in [instrument.id] + aliases:
+            registry[alias.upper()] = instrument
+
+    for base in CURRENCIES:
+        for quote in CURRENCIES:
+            if base != quote:
+                instrument = _forex_instrument(base, quote)
+                add(instrument, [f'{base}{quote}', f'{base}{quote}=X', f'{base}-{quote}'])
+    for asset in CRYPTO_ASSETS:
+        add(_crypto_instrument(asset), [f'{asset}USDT', f'{asset}/USDT', f'{asset}USD', f'{asset}-USD'])
+    # Special instruments go last so they win over any generated alias
+    for instrument, aliases in SPECIAL_INSTRUMENTS:
+        add(instrument, aliases)
+    return registry
+
+
+SYMBOL_REGISTRY = _build_registry()
+INSTRUMENTS_BY_ID = {instrument.id: instrument for instrument in SYMBOL_REGISTRY.values()}
+
+ALL_CURRENCIES = set(CURRENCIES + EXTRA_CURRENCIES)
+
+
+@lru_cache(maxsize=4096)
+def _resolve_unregistered(symbol):
+    """Applies the ticker rules to symbols outside the precomputed registry."""
+    match = re.fullmatch(r'([A-Z]{3})[/-]?([A-Z]{3})(=X)?', symbol)
+    if match and match.group(1) in ALL_CURRENCIES and match.group(2) in ALL_CURRENCIES:
+        return _forex_instrument(match.group(1), match.group(2))
+
+    match = re.fullmatch(r'([A-Z0-9]+)(?:/USDT|USDT|/USD|-USD)', symbol)
+    if match:
+        return _crypto_instrument(match.group(1))
+
+    if '/' in symbol:
+        base, _, quote = symbol.partition('/')
+        return Instrument(symbol, 'forex', f'{base}{quote}=X')
+
+    return Instrument(symbol, 'equity', symbol)
+
+
+def resolve_symbol(symbol):
+    """Returns the Instrument for any accepted spelling of a symbol.
+
+    'EUR/USD', 'EURUSD', 'eurusd' and 'EURUSD=X' all resolve to the same
+    instrument; known names are a single dict lookup.
+    """
+    symbol = symbol.strip().upper()
+    instrument = SYMBOL_REGISTRY.get(symbol)
+    if instrument is None:
+        instrument = _resolve_unregistered(symbol)
+    return instrument
+
+
+def get_instrument(instrument_id):
+    """Returns the Instrument for a canonical id."""
+    instrument = INSTRUMENTS_BY_ID.get(instrument_id)
+    if instrument is None:
+        instrument = resolve_symbol(instrument_id)
+    return instrument
@@ -0,0 +1,98 @@
+import logging
+import threading
+
+import pandas as pd
+import pytest
+
+import providers
+from fetch_scheduler import FetchScheduler
+from providers import MarketDataProvider, ProviderRateLimitError, YFinanceProvider
+
+
+def bars():
+    index = pd.date_range('2026-01-05', periods=3, freq='min', tz='UTC', name='Datetime')
+    return pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 0.0}, index=index)
+
+
+class ThrottledOnceProvider(MarketDataProvider):
+    name = 'test'
+
+    def __init__(self):
+        self.calls = 0
+
+    def download(self, tickers, interval, start=None, end=None, period=None, auto_adjust=False):
+        self.calls += 1
+        if self.calls == 1:
+            raise ProviderRateLimitError('429 Too Many Requests')
+        return {ticker: bars() for ticker in tickers}
+
+
+def test_scheduler_retries_after_rate_limit():
+    provider = ThrottledOnceProvider()
+    scheduler = FetchScheduler(provider, window_seconds=0, max_batch=10, backoff_seconds=0.01)
+
+    frames = scheduler.download(['EURUSD=X'], '1m', period='1d')
+
+    assert provider.calls == 2
+    assert scheduler.stats()['retries'] == 1
+    assert len(frames['EURUSD=X']) == 3
+
+
+def test_scheduler_gives_up_after_max_retries():
+    class AlwaysThrottled(ThrottledOnceProvider):
+        def download(self, *args, **kwargs):
+            self.calls += 1
+            raise ProviderRateLimitError('429 Too Many Requests')
+
+    provider = AlwaysThrottled()
+    scheduler = FetchScheduler(provider, window_seconds=0, max_batch=10, max_retries=2, backoff_seconds=0.01)
+
+    with pytest.raises(ProviderRateLimitError):
+        scheduler.download(['EURUSD=X'], '1m', period='1d')
+    assert provider.calls == 3
+
+
+def test_yfinance_provider_raises_when_a_ticker_was_throttled(monkeypatch):
+    def fake_download(tickers, **kwargs):
+        # What yf.download does with a throttled ticker: log it and return no rows
+        logging.getLogger('yfinance').error("['EURUSD=X']: YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')")
+        return pd.DataFrame()
+
+    monkeypatch.setattr(providers.yf, 'download', fake_download)
+
+    with pytest.raises(ProviderRateLimitError):
+        YFinanceProvider().download(['EURUSD=X'], '1m', period='1d')
+
+
+def test_yfinance_throttling_of_a_concurrent_call_is_not_shared(monkeypatch):
+    good_started = threading.Event()
+    throttled_logged = threading.Event()
+    good_may_finish = threading.Event()
+
+    def fake_download(tickers, **kwargs):
+        if tickers == ['EURUSD=X']:
+            logging.getLogger('yfinance').error("['EURUSD=X']: YFRateLimitError('Too Many Requests.')")
+            throttled_logged.set()
+            return pd.DataFrame()
+        # The good call is still in flight while the other one logs its throttling
+        good_started.set()
+        good_may_finish.wait(5)
+        return bars()
+
+    monkeypatch.setattr(providers.yf, 'download', fake_download)
+    provider = YFinanceProvider()
+    results = {}
+
+    def download_good():
+        results['good'] = provider.download(['GBPUSD=X'], '1m', period='1d')
+
+    good = threading.Thread(target=download_good)
+    good.start()
+    assert good_started.wait(5)
+    with pytest.raises(ProviderRateLimitError):
+        provider.download(['EURUSD=X'], '1m', period='1d')
+    assert throttled_logged.is_set()
+    good_may_finish.set()
+    good.join(5)
+
+    assert len(results['good']['GBPUSD=X']) == 3
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# The USD major for every other major currency; for USD/XXX legs the currency is the quote
+USD_MAJORS = {
+    'EUR': 'EUR/USD',
+    'GBP': 'GBP/USD',
+    'AUD': 'AUD/USD',
+    'NZD': 'NZD/USD',
+    'JPY': 'USD/JPY',
+    'CHF': 'USD/CHF',
+    'CAD': 'USD/CAD',
+}
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+
+class Triangulator:
+    """Derives crosses of the majors, such as EUR/JPY, from their two USD legs.
+
+    A cross is quoted as the USD value of its base over the USD value of its
+    quote, e.g. EUR/JPY = EUR/USD * USD/JPY, so one download of the seven USD
+    majors prices every cross at the same timestamps. Pairs listed as
+    authoritative, and anything that is not a cross of two majors, are still
+    fetched directly.
+    """
+
+    def __init__(self, enabled, authoritative=()):
+        self.enabled = enabled
+        self.authoritative = set(authoritative)
+        self.derived_prices = 0
+        self.derived_frames = 0
+
+    def legs(self, instrument_id):
+        """Returns the (base, quote) USD legs for a derivable cross, or None to fetch it directly."""
+        if not self.enabled or instrument_id in self.authoritative:
+            return None
+        base, _, quote = instrument_id.partition('/')
+        if base not in USD_MAJORS or quote not in USD_MAJORS:
+            return None
+        return USD_MAJORS[base], USD_MAJORS[quote]
+
+    def split(self, instrument_ids):
+        """Splits instrument ids into {cross: legs} and the ids to fetch directly, legs included."""
+        crosses = {}
+        direct = []
+        for instrument_id in instrument_ids:
+            legs = self.legs(instrument_id)
+            if legs is None:
+                direct.append(instrument_id)
+            else:
+                crosses[instrument_id] = legs
+        for legs in crosses.values():
+            for leg in legs:
+                if leg not in direct:
+                    direct.append(leg)
+        return crosses, direct
+
+    def prices(self, crosses, leg_prices):
+        """Computes cross prices from leg prices in one vectorized pass; crosses missing a leg are left out."""
+        complete = [
+            cross for cross, (base, quote) in crosses.items()
+            if leg_prices.get(base) is not None and leg_prices.get(quote) is not None
+        ]
+        if not complete:
+            return {}
+        base = np.array([_usd_value(crosses[cross][0], leg_prices[crosses[cross][0]]) for cross in complete], dtype=float)
+        quote = np.array([_usd_value(crosses[cross][1], leg_prices[crosses[cross][1]]) for cross in complete], dtype=float)
+        values = base / quote
+        self.derived_prices += len(complete)
+        return {cross: float(value) for cross, value in zip(complete, values)}
+
+    def frame(self, base_leg, base_frame, quote_leg, quote_frame):
+        """Approximates cross OHLC bars from the two leg frames over their common timestamps.
+
+        Open and close are exact ratios. The cross high and low are not
+        recoverable from leg bars, so each is estimated from one leg's extreme
+        against the other leg's close and bounded by the open and close.
+        """
+        if base_frame is None or quote_frame is None or base_frame.empty or quote_frame.empty:
+            return pd.DataFrame()
+        base = _usd_bars(base_leg, base_frame)
+        quote = _usd_bars(quote_leg, quote_frame)
+        base, quote = base.align(quote, join='inner')
+        if base.empty:
+            return pd.DataFrame()
+
+        open_ = base['Open'] / quote['Open']
+        close = base['Close'] / quote['Close']
+        high = np.maximum.reduce([
+            open_.to_numpy(), close.to_numpy(),
+            (base['High'] / quote['Close']).to_numpy(), (base['Close'] / quote['Low']).to_numpy(),
+        ])
+        low = np.minimum.reduce([
+            open_.to_numpy(), close.to_numpy(),
+            (base['Low'] / quote['Close']).to_numpy(), (base['Close'] / quote['High']).to_numpy(),
+        ])
+        self.derived_frames += 1
+        return pd.DataFrame({
+            'Open': open_.to_numpy(),
+            'High': high,
+            'Low': low,
+            'Close': close.to_numpy(),
+            'Adj Close': close.to_numpy(),
+            'Volume': np.zeros(len(close)),
+        }, index=base.index)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'authoritative': sorted(self.authoritative),
+            'derived_prices': self.derived_prices,
+            'derived_frames': self.derived_frames,
+        }
+
+
+def _usd_value(leg, price):
+    """The USD value of one unit of the leg's non-USD currency."""
+    return 1.0 / price if leg.startswith('USD/') else price
+
+
+def _usd_bars(leg, frame):
+    """Leg bars expressed as the USD value of its non-USD currency; inverting swaps high and low."""
+    bars = frame[PRICE_COLUMNS].astype(float)
+    if not leg.startswith('USD/'):
+        return bars
+    return pd.DataFrame({
+        'Open': 1.0 / bars['Open'],
+        'High': 1.0 / bars['Low'],
+        'Low': 1.0 / bars['High'],
+        'Close': 1.0 / bars['Close'],
+    }, index=bars.index)
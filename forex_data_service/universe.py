@@ -0,0 +1,136 @@
+import math
+import threading
+import time
+
+
+class SymbolUniverse:
+    """The symbols the bulk price refresher keeps prices for, tiered by demand.
+
+    Symbols join when a client asks for them. Each symbol's tier follows from
+    how long ago it was last requested, and each tier has its own refresh
+    interval, so the provider budget goes to what clients are looking at.
+    Pinned symbols are always kept, but tier by demand like the rest, so
+    unrequested ones refresh on the coldest interval; the others are dropped
+    once nobody has asked for them for drop_after_seconds.
+    """
+
+    def __init__(self, pinned, tiers, drop_after_seconds, max_symbols):
+        # tiers: (name, max_idle_seconds, refresh_seconds), most active first
+        self.tiers = tiers
+        self.drop_after_seconds = drop_after_seconds
+        self.max_symbols = max_symbols
+        self.pinned = set(pinned)
+        self._last_requested = {symbol: None for symbol in pinned}
+        self._last_refreshed = {}
+        self._requests = {}
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.dropped = 0
+
+    def record(self, symbols, now=None):
+        """Notes a client request for symbols; returns True if any became hot and is now due."""
+        now = now or time.time()
+        promoted = False
+        with self._lock:
+            for symbol in symbols:
+                if symbol not in self._last_requested:
+                    if len(self._last_requested) >= self.max_symbols and not self._evict_idlest():
+                        continue
+                    self._last_requested[symbol] = None
+                    self.admitted += 1
+                previous_tier = self._tier(symbol, now)
+                self._last_requested[symbol] = now
+                self._requests[symbol] = self._requests.get(symbol, 0) + 1
+                if previous_tier != self.tiers[0][0] and self._is_due(symbol, now):
+                    promoted = True
+        return promoted
+
+    def requested_since(self, since):
+        """Returns {symbol: last request time} for symbols requested at or after since."""
+        with self._lock:
+            return {
+                symbol: last_requested for symbol, last_requested in self._last_requested.items()
+                if last_requested is not None and last_requested >= since
+            }
+
+    def merge(self, requested):
+        """Adopts request times seen elsewhere, e.g. by other worker processes, without counting them again."""
+        with self._lock:
+            for symbol, last_requested in requested.items():
+                if symbol not in self._last_requested:
+                    if len(self._last_requested) >= self.max_symbols and not self._evict_idlest():
+                        continue
+                    self._last_requested[symbol] = None
+                    self.admitted += 1
+                if self._last_requested[symbol] is None or self._last_requested[symbol] < last_requested:
+                    self._last_requested[symbol] = last_requested
+
+    def _evict_idlest(self):
+        candidates = [symbol for symbol in self._last_requested if symbol not in self.pinned]
+        if not candidates:
+            return False
+        idlest = min(candidates, key=lambda symbol: self._last_requested[symbol] or 0)
+        self._remove(idlest)
+        return True
+
+    def _remove(self, symbol):
+        del self._last_requested[symbol]
+        self._last_refreshed.pop(symbol, None)
+        self._requests.pop(symbol, None)
+        self.dropped += 1
+
+    def _idle(self, symbol, now):
+        last_requested = self._last_requested[symbol]
+        return math.inf if last_requested is None else now - last_requested
+
+    def _tier_entry(self, symbol, now):
+        idle = self._idle(symbol, now)
+        for entry in self.tiers:
+            if idle <= entry[1]:
+                return entry
+        return self.tiers[-1]
+
+    def _tier(self, symbol, now):
+        return self._tier_entry(symbol, now)[0]
+
+    def _is_due(self, symbol, now):
+        last_refreshed = self._last_refreshed.get(symbol)
+        return last_refreshed is None or now - last_refreshed >= self._tier_entry(symbol, now)[2]
+
+    def due(self, now=None):
+        """Drops unused symbols and returns those whose tier interval has passed since their last refresh."""
+        now = now or time.time()
+        with self._lock:
+            for symbol in list(self._last_requested):
+                if symbol not in self.pinned and self._idle(symbol, now) > self.drop_after_seconds:
+                    self._remove(symbol)
+            # A small allowance so symbols refreshed on the previous tick are not skipped by jitter
+            return [symbol for symbol in self._last_requested if self._is_due(symbol, now + 1)]
+
+    def mark_refreshed(self, symbols, now=None):
+        now = now or time.time()
+        with self._lock:
+            for symbol in symbols:
+                if symbol in self._last_requested:
+                    self._last_refreshed[symbol] = now
+
+    def members(self):
+        with self._lock:
+            return set(self._last_requested)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            tiers = {name: 0 for name, _, _ in self.tiers}
+            for symbol in self._last_requested:
+                tiers[self._tier(symbol, now)] += 1
+            hottest = sorted(self._requests.items(), key=lambda item: item[1], reverse=True)[:10]
+            return {
+                'symbols': len(self._last_requested),
+                'pinned': len(self.pinned),
+                'tiers': tiers,
+                'refresh_seconds': {name: refresh for name, _, refresh in self.tiers},
+                'admitted': self.admitted,
+                'dropped': self.dropped,
+                'most_requested': dict(hottest),
+            }
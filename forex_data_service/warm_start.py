@@ -0,0 +1,131 @@
+import atexit
+import os
+import pickle
+import signal
+import threading
+import time
+
+
+class CacheSnapshotter:
+    """Saves caches and the price snapshot to disk and loads them back after a restart.
+
+    The file is rewritten every interval_seconds, at interpreter exit and on
+    SIGTERM, via a temporary file so a crash mid-write leaves the previous snapshot intact.
+    Loaded entries stay servable for at least stale_seconds even if their TTL
+    ran out while the process was down, which covers the requests that arrive
+    before the prefetch has replaced them; anything saved more than
+    max_age_seconds ago is not loaded at all.
+    """
+
+    def __init__(self, path, caches, refresher, interval_seconds, stale_seconds, max_age_seconds):
+        self.path = path
+        self.caches = caches
+        self.refresher = refresher
+        self.interval_seconds = interval_seconds
+        self.stale_seconds = stale_seconds
+        self.max_age_seconds = max_age_seconds
+        self.saves = 0
+        self.save_errors = 0
+        self.last_saved = None
+        self.restored = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._save_lock = threading.Lock()
+
+    def save(self):
+        """Writes every cache's live entries and the price snapshot to path."""
+        with self._save_lock:
+            try:
+                state = {
+                    'saved_at': time.time(),
+                    'caches': {name: cache.items() for name, cache in self.caches.items()},
+                    'prices': (self.refresher.snapshot, self.refresher.snapshot_time),
+                }
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                temp_path = f'{self.path}.{os.getpid()}.tmp'
+                with open(temp_path, 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.path)
+                self.saves += 1
+                self.last_saved = state['saved_at']
+                return True
+            except Exception as e:
+                self.save_errors += 1
+                print(f"Error saving cache snapshot: {str(e)}")
+                return False
+
+    def load(self):
+        """Restores the caches and price snapshot from path; returns the number of entries loaded."""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            print(f"Error loading cache snapshot: {str(e)}")
+            return 0
+
+        now = time.time()
+        if now - state['saved_at'] > self.max_age_seconds:
+            return 0
+        for name, entries in state['caches'].items():
+            cache = self.caches.get(name)
+            if cache is None:
+                continue
+            for key, value, expires_at in entries:
+                cache.set(key, value, max(expires_at - now, self.stale_seconds))
+            self.restored[name] = len(entries)
+
+        snapshot, snapshot_time = state['prices']
+        if snapshot and snapshot_time > self.refresher.snapshot_time:
+            # Keep the real snapshot time so age headers stay honest
+            self.refresher.snapshot = snapshot
+            self.refresher.snapshot_time = snapshot_time
+            self.restored['prices'] = len(snapshot)
+        return sum(self.restored.values())
+
+    def start(self):
+        """Starts periodic saving once and saves again when the process exits."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='cache-snapshotter', daemon=True)
+            self._thread.start()
+            atexit.register(self.save)
+
+    def save_on_sigterm(self):
+        """Saves on SIGTERM, which skips atexit, then lets the previously installed handler run.
+
+        Only takes effect on the main thread. Nothing is saved before start(),
+        so a worker stopped before it loaded the file cannot overwrite it.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def handle_sigterm(signum, frame):
+            if self._thread is not None:
+                self.save()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                # The default action: terminate, now that the snapshot is written
+                signal.signal(signum, signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.save()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'saves': self.saves,
+            'save_errors': self.save_errors,
+            'last_saved': self.last_saved,
+            'restored': self.restored,
+        }
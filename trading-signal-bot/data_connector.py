@@ -1,36 +1,24 @@
-import yfinance as yf
 import pandas as pd
+import os
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-def format_symbol_for_yfinance(symbol):
-    """Formats a trading symbol into a yfinance-compatible ticker."""
-    symbol = symbol.upper()
-    if '/' in symbol:
-        # Forex pair
-        return f"{symbol.replace('/', '')}=X"
-    if symbol.endswith('USDT'):
-        # Crypto pair
-        return f"{symbol.replace('USDT', '')}-USD"
-    
-    # Mapping for common indices and commodities
-    special_symbols = {
-        'US30': '^DJI',
-        'SPX500': '^GSPC',
-        'NAS100': '^IXIC',
-        'XAU/USD': 'GC=F',
-        'XAUUSD': 'GC=F',
-        'XAG/USD': 'SI=F',
-        'XAGUSD': 'SI=F',
-        'USOIL': 'CL=F',
-    }
-    return special_symbols.get(symbol, symbol)
+# Market data providers are shared with the forex data service
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'forex_data_service'))
+from chunked_fetch import PROVIDER_LOOKBACKS, clamp_start, download_chunked
+from providers import create_provider
+from symbols import resolve_symbol
+
+provider = create_provider()
+# Long intraday ranges are split into provider-sized chunks fetched in parallel
+chunk_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('FOREX_CHUNK_FETCH_WORKERS', 4)))
 
 def get_historical_data(symbol, timeframe, start_date=None, end_date=None):
     """
     Fetches historical market data from Yahoo Finance with flexible date ranges.
     """
-    formatted_symbol = format_symbol_for_yfinance(symbol)
+    formatted_symbol = resolve_symbol(symbol).provider_ticker
 
     timeframe_map = {
         '1m': '1m', '5m': '5m', '15m': '15m', '30m': '30m',
@@ -40,17 +28,25 @@ def get_historical_data(symbol, timeframe, start_date=None, end_date=None):
     if not yf_timeframe:
         return {"error": f"Unsupported timeframe: {timeframe}. Please use a standard format (e.g., '1m', '1h', '1d')."}
 
-    params = {'interval': yf_timeframe, 'progress': False, 'auto_adjust': False}
-    if start_date and end_date:
-        params['start'] = start_date
-        params['end'] = end_date
-    else:
-        params['period'] = "1mo" if yf_timeframe in ['1d', '1wk', '1mo'] else "7d"
+    period = None
+    if not (start_date and end_date):
+        start_date = end_date = None
+        period = "1mo" if yf_timeframe in ['1d', '1wk', '1mo'] else "7d"
 
     try:
-        data = yf.download(tickers=formatted_symbol, **params)
+        if period is None:
+            requested_start = start_date
+            start_date, clamped = clamp_start(yf_timeframe, start_date, end_date)
+            if start_date is None:
+                return {"error": f"{timeframe} data is only available for the last {PROVIDER_LOOKBACKS[yf_timeframe].days} days."}
+            if clamped:
+                # stdout carries the JSON result
+                print(f"Warning: {timeframe} data starts at {start_date}, not {requested_start}", file=sys.stderr)
+            data = download_chunked(provider.download, [formatted_symbol], yf_timeframe, start_date, end_date, chunk_executor).get(formatted_symbol)
+        else:
+            data = provider.download([formatted_symbol], yf_timeframe, period=period).get(formatted_symbol)
         
-        if data.empty:
+        if data is None or data.empty:
             return {"error": f"No data found for symbol {formatted_symbol}. Check the symbol or adjust the date range."}
 
         data.reset_index(inplace=True)
@@ -64,7 +60,7 @@ def get_historical_data(symbol, timeframe, start_date=None, end_date=None):
         }, inplace=True)
 
         # Ensure timestamps are in ISO 8601 format
-        data['date'] = pd.to_datetime(data['date']).dt.tz_localize(None).isoformat()
+        data['date'] = pd.to_datetime(data['date']).dt.tz_localize(None).dt.strftime('%Y-%m-%dT%H:%M:%S')
 
         required_cols = ['date', 'open', 'high', 'low', 'close']
         if 'volume' in data.columns: